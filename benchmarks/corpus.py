@@ -0,0 +1,170 @@
+"""Seeded generator of synthetic Markdown documents.
+
+Each kind stresses one part of the pipeline; the same kind, size and seed
+always give the same document.
+
+    prose     headings and long paragraphs with light inline markup
+    code      fenced code blocks in several languages between short paragraphs
+    table     tables of mixed plain and styled cells
+    list      bullet and ordered lists with inline markup
+    image     block and inline images with captions
+    emphasis  unmatched and deeply nested *, _, ` and [ delimiters
+
+    python benchmarks/corpus.py prose [--size 100000] [--seed 0] > prose.md
+"""
+import argparse
+import random
+import sys
+
+KINDS = ("prose", "code", "table", "list", "image", "emphasis")
+
+WORDS = (
+    "render terminal markdown stream cache table column width parser token block "
+    "inline theme color latency memory buffer window worker throughput document "
+    "heading paragraph quote image code link list item value report layout"
+).split()
+
+LANGUAGES = ("python", "javascript", "rust", "go", "sql", "bash", "yaml", "")
+
+CODE_LINES = {
+    "python": ("def {w}(items):", "    return [item.{w} for item in items if item]", "total = sum({w} for {w} in range(10))"),
+    "javascript": ("const {w} = (xs) => xs.map((x) => x * 2);", "export function {w}() {{ return null; }}"),
+    "rust": ("fn {w}(x: u32) -> u32 {{ x + 1 }}", "let {w}: Vec<u8> = Vec::new();"),
+    "go": ("func {w}(x int) int {{ return x * 2 }}", "var {w} = map[string]int{{}}"),
+    "sql": ("SELECT {w}, count(*) FROM events GROUP BY {w};", "CREATE INDEX idx_{w} ON t ({w});"),
+    "bash": ("for f in *.{w}; do echo \"$f\"; done", "export {w}=1"),
+    "yaml": ("{w}:", "  enabled: true", "  items: [1, 2, 3]"),
+    "": ("plain {w} text", "no highlighting here"),
+}
+
+
+def _words(rnd: random.Random, count: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(count))
+
+
+def _inline(rnd: random.Random, count: int) -> str:
+    """A run of words with occasional bold, italic, code and links"""
+    parts = []
+    for _ in range(count):
+        word = rnd.choice(WORDS)
+        roll = rnd.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.10:
+            word = f"*{word}*"
+        elif roll < 0.14:
+            word = f"`{word}()`"
+        elif roll < 0.16:
+            word = f"[{word}](https://example.com/{word})"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def _prose(rnd: random.Random) -> str:
+    blocks = [f"{'#' * rnd.randint(1, 4)} {_words(rnd, rnd.randint(2, 6)).title()}"]
+    for _ in range(rnd.randint(2, 4)):
+        lines = [_inline(rnd, rnd.randint(10, 16)) for _ in range(rnd.randint(2, 6))]
+        blocks.append("\n".join(lines))
+    if rnd.random() < 0.3:
+        blocks.append("> " + _inline(rnd, 20))
+    return "\n\n".join(blocks)
+
+
+def _code(rnd: random.Random) -> str:
+    language = rnd.choice(LANGUAGES)
+    templates = CODE_LINES[language]
+    lines = [rnd.choice(templates).format(w=rnd.choice(WORDS)) for _ in range(rnd.randint(4, 30))]
+    return f"{_inline(rnd, 12)}\n\n```{language}\n" + "\n".join(lines) + "\n```"
+
+
+def _table(rnd: random.Random) -> str:
+    columns = rnd.randint(2, 7)
+    rows = [
+        "| " + " | ".join(rnd.choice(WORDS).title() for _ in range(columns)) + " |",
+        "|" + "|".join(rnd.choice(("---", ":--", ":-:", "--:")) for _ in range(columns)) + "|",
+    ]
+    for _ in range(rnd.randint(3, 40)):
+        cells = []
+        for _ in range(columns):
+            roll = rnd.random()
+            if roll < 0.5:
+                cells.append(str(rnd.randint(0, 10 ** rnd.randint(1, 6))))
+            elif roll < 0.8:
+                cells.append(_words(rnd, rnd.randint(1, 3)))
+            else:
+                cells.append(_inline(rnd, 2))
+        rows.append("| " + " | ".join(cells) + " |")
+    return "\n".join(rows)
+
+
+def _list(rnd: random.Random) -> str:
+    marker = rnd.choice(("-", "*", "+", "1."))
+    items = []
+    for number in range(1, rnd.randint(3, 15)):
+        prefix = f"{number}." if marker == "1." else marker
+        items.append(f"{prefix} {_inline(rnd, rnd.randint(3, 20))}")
+    return "\n".join(items)
+
+
+def _image(rnd: random.Random) -> str:
+    name = rnd.choice(WORDS)
+    if rnd.random() < 0.6:
+        return f"![{_words(rnd, 3)}](images/{name}-{rnd.randint(0, 999)}.png)"
+    return f"{_inline(rnd, 8)} ![{name}](img/{name}.png) {_inline(rnd, 6)}"
+
+
+def _emphasis(rnd: random.Random) -> str:
+    lines = []
+    for _ in range(rnd.randint(1, 4)):
+        tokens = []
+        for _ in range(rnd.randint(20, 60)):
+            roll = rnd.random()
+            if roll < 0.4:
+                tokens.append(rnd.choice(("*", "_", "**", "__", "`", "[", "](", "![", "<!--")))
+            elif roll < 0.55:
+                depth = rnd.randint(2, 8)
+                tokens.append("*" * depth + rnd.choice(WORDS) + "_" * depth)
+            else:
+                tokens.append(rnd.choice(WORDS))
+        lines.append(" ".join(tokens))
+    return "\n".join(lines)
+
+
+_BLOCKS = {
+    "prose": _prose,
+    "code": _code,
+    "table": _table,
+    "list": _list,
+    "image": _image,
+    "emphasis": _emphasis,
+}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> str:
+    """A document of ``kind`` at least ``size`` characters long, the same for the same seed"""
+    if kind not in _BLOCKS:
+        raise ValueError(f"unknown corpus kind {kind!r} (choose from {', '.join(KINDS)})")
+    
+    rnd = random.Random(f"{kind}:{seed}")
+    make_block = _BLOCKS[kind]
+    blocks = []
+    length = 0
+    while length < size:
+        # A little prose between blocks keeps every kind a realistic mix
+        block = make_block(rnd) if kind == "prose" or rnd.random() < 0.85 else _prose(rnd)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("kind", choices=KINDS)
+    arg_parser.add_argument("--size", type=int, default=100_000, help="minimum document size in characters")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    sys.stdout.write(generate(args.kind, args.size, args.seed))
+
+
+if __name__ == "__main__":
+    main()
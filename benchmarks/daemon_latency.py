@@ -0,0 +1,72 @@
+"""Render latency through the daemon against a fresh process per render.
+
+Starts ``daemon.py --serve`` on a temporary socket, then times renders of a
+small generated document three ways: ``render_via_daemon`` from this
+process, the ``daemon.py`` client as a new process, and ``renderer.py`` as
+a new process.
+
+    python benchmarks/daemon_latency.py [--size 4000] [--repeat 20]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate
+from daemon import render_via_daemon, request
+
+
+def per_run_ms(run, repeat: int) -> float:
+    """Mean time of ``repeat`` runs after one untimed run"""
+    run()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size", type=int, default=4000, help="document size in characters")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "daemon.sock")
+        document = os.path.join(tmp, "doc.md")
+        source = generate("code", args.size)
+        with open(document, "w") as f:
+            f.write(source)
+        
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "daemon.py"), "--serve",
+                                   "--socket", socket_path, "--theme-seed", "0"])
+        try:
+            while request({"command": "ping"}, socket_path=socket_path) is None:
+                time.sleep(0.05)
+            
+            def run(command):
+                subprocess.run([sys.executable] + command, stdout=subprocess.DEVNULL, check=True)
+            
+            in_daemon = per_run_ms(lambda: render_via_daemon(source, 100, True, 0, socket_path), args.repeat)
+            client = per_run_ms(lambda: run([os.path.join(ROOT, "daemon.py"), "--socket", socket_path,
+                                             "--color", "always", "--width", "100", document]), args.repeat)
+            cold = per_run_ms(lambda: run([os.path.join(ROOT, "renderer.py"), "--color", "always",
+                                           "--theme-seed", "0", document]), args.repeat)
+        finally:
+            request({"command": "shutdown"}, socket_path=socket_path)
+            server.wait()
+    
+    print(f"{len(source):,} characters")
+    print(f"render_via_daemon:          {in_daemon:8.2f} ms")
+    print(f"daemon.py client process:   {client:8.2f} ms")
+    print(f"renderer.py process:        {cold:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Object tree versus flat tree on a large generated document.
+
+For each representation reports build time, memory retained by the tree
+(traced with tracemalloc in a second, slower build), the time of a full garbage collection while the
+tree is alive, and the time to collect the plain text of every block.
+
+    python benchmarks/flat_tree.py [--megabytes 10]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from doctree import FlatTree
+from parser import MarkdownParser
+from renderer import BoxDrawing, ColorConfig
+
+SECTION = """## Section heading with `code`
+
+A paragraph with **bold**, *italic* and a [link](https://example.com/page)
+that continues on a second line with more `inline code` and __strong__ text.
+
+- first item with *emphasis*
+- second item with a [reference](https://example.com)
+
+```python
+def handler(event):
+    return event
+```
+
+| Name | Value |
+|------|:-----:|
+| **a** | `1` |
+| b | 2 |
+
+"""
+
+
+def timed(build):
+    """Build twice: once for the time, once under tracemalloc for the retained memory"""
+    gc.collect()
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained
+
+
+def gc_time() -> float:
+    started = time.perf_counter()
+    gc.collect()
+    return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--megabytes", type=float, default=10)
+    args = arg_parser.parse_args()
+    
+    source = SECTION * max(1, int(args.megabytes * 1024 * 1024 / len(SECTION)))
+    print(f"document: {len(source) / 1024 / 1024:.1f} MB")
+    box_tools = BoxDrawing(ColorConfig(False))
+    
+    elements, build_seconds, retained = timed(lambda: MarkdownParser().parse(source))
+    collect_seconds = gc_time()
+    started = time.perf_counter()
+    for element in elements:
+        if not isinstance(element.content, str) and isinstance(element.content, list):
+            box_tools._get_plain_text(element.content)
+    walk_seconds = time.perf_counter() - started
+    print(f"objects: build {build_seconds:6.2f}s  retained {retained / 1024 / 1024:7.1f} MB  "
+          f"gc {collect_seconds * 1000:7.1f} ms  plain text {walk_seconds:5.2f}s")
+    del elements
+    
+    tree, build_seconds, retained = timed(lambda: FlatTree.parse(source))
+    tree.text
+    collect_seconds = gc_time()
+    started = time.perf_counter()
+    for node in tree.roots():
+        tree.text_of(node)
+    walk_seconds = time.perf_counter() - started
+    print(f"flat:    build {build_seconds:6.2f}s  retained {retained / 1024 / 1024:7.1f} MB  "
+          f"gc {collect_seconds * 1000:7.1f} ms  plain text {walk_seconds:5.2f}s  "
+          f"({len(tree):,} nodes, {tree.nbytes / len(tree):.0f} bytes/node in arrays)")
+
+
+if __name__ == "__main__":
+    main()
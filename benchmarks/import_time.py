@@ -0,0 +1,95 @@
+"""Startup latency guard.
+
+Imports ``renderer`` in fresh interpreters under ``-X importtime``, reports
+the best cumulative import time over several runs and the wall time of
+rendering a small plain note through the CLI, and exits non-zero when the
+import pulls in a dependency that should be lazy, or takes more than
+``--max-ratio`` times as long as importing ``parser`` on the same machine.
+``parser`` has no optional dependencies, so the ratio does not depend on
+how fast the machine is.
+
+    python benchmarks/import_time.py [--runs 7] [--max-ratio 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported once a code block or image needs them
+LAZY_MODULES = ("pygments", "term_image", "PIL")
+
+NOTE = "# Note\n\nA short note with **bold**, *italic* and a [link](https://example.com).\n\n- one\n- two\n"
+
+
+def import_profile(module: str = "renderer"):
+    """Return (cumulative microseconds for ``module``, imported module names) from one fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = None
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        modules.add(name.split(".")[0])
+        if name == module:
+            total = int(cumulative)
+    return total, modules
+
+
+def cli_wall_time(path):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "renderer.py"), path],
+                   cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=7)
+    arg_parser.add_argument("--max-ratio", type=float, default=3.0,
+                            help="largest allowed renderer import time as a multiple of parser's")
+    args = arg_parser.parse_args()
+    
+    samples = []
+    modules = set()
+    for _ in range(args.runs):
+        total, imported = import_profile()
+        samples.append(total)
+        modules |= imported
+    baseline = [import_profile("parser")[0] for _ in range(args.runs)]
+    
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as f:
+        f.write(NOTE)
+    try:
+        walls = [cli_wall_time(f.name) for _ in range(args.runs)]
+    finally:
+        os.unlink(f.name)
+    
+    best_ms = min(samples) / 1000
+    baseline_ms = min(baseline) / 1000
+    ratio = best_ms / baseline_ms
+    print(f"import renderer: best {best_ms:.1f} ms, median {sorted(samples)[len(samples) // 2] / 1000:.1f} ms")
+    print(f"import parser: best {baseline_ms:.1f} ms, renderer/parser ratio {ratio:.2f}")
+    print(f"CLI on a plain note: best {min(walls) * 1000:.1f} ms")
+    
+    failed = False
+    eager = sorted(m for m in LAZY_MODULES if m in modules)
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if ratio > args.max_ratio:
+        print(f"FAIL: import time over {args.max_ratio:g}x the parser baseline")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
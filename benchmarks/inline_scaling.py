@@ -0,0 +1,47 @@
+"""Inline tokenizer scaling benchmark.
+
+Parses single paragraphs of mixed inline markup from 10 KB up to 10 MB and
+prints the time per kilobyte for each size.  With the single-pass tokenizer
+the per-KB figure should stay flat as the paragraph grows.
+
+    python benchmarks/inline_scaling.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import MarkdownParser
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Includes unmatched delimiters so the closing-delimiter lookups are exercised
+CHUNK = (
+    "Plain words with **bold text** and *italic text* and `inline code` "
+    "plus a [link to docs](https://example.com/docs) and a stray * or _ "
+    "or [bracket that never closes, then __underscored bold__ and _emph_. "
+)
+
+
+def make_paragraph(size: int) -> str:
+    return (CHUNK * (size // len(CHUNK) + 1))[:size]
+
+
+def main():
+    parser = MarkdownParser()
+    baseline = None
+    print(f"{'size':>12} {'seconds':>10} {'us/KB':>10} {'vs 10KB':>8}")
+    for size in SIZES:
+        text = make_paragraph(size)
+        start = time.perf_counter()
+        parser._parse_inline(text)
+        elapsed = time.perf_counter() - start
+        per_kb = elapsed * 1e6 / (size / 1000)
+        if baseline is None:
+            baseline = per_kb
+        print(f"{size:>12,} {elapsed:>10.4f} {per_kb:>10.1f} {per_kb / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Large table rendering throughput.
+
+Renders a generated data-dump table through ``render_to`` and reports rows
+per second from ``BoxDrawing.table_stats``, plus the number and largest size
+of the pieces written, which ``TABLE_CHUNK_ROWS`` keeps bounded.
+
+    python benchmarks/large_table.py [--rows 100000] [--columns 6]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renderer import EnhancedMarkdownRenderer
+
+VALUES = ["true", "false", "0", "1", "n/a", "**error**", "`0x1f`", "ok", "pending", "[ref](https://example.com)"]
+
+
+def table(rows: int, columns: int) -> str:
+    rnd = random.Random(0)
+    lines = [
+        "| " + " | ".join(f"column {i}" for i in range(columns)) + " |",
+        "|" + "|".join(["---", ":--:", "--:"][i % 3] for i in range(columns)) + "|",
+    ]
+    for row in range(rows):
+        cells = [str(row)] + [rnd.choice(VALUES) for _ in range(columns - 1)]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+class PieceCounter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.pieces = 0
+        self.largest = 0
+    
+    def write(self, text):
+        self.pieces += 1
+        self.largest = max(self.largest, len(text))
+        return len(text)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=100000)
+    arg_parser.add_argument("--columns", type=int, default=6)
+    args = arg_parser.parse_args()
+    
+    source = table(args.rows, args.columns)
+    renderer = EnhancedMarkdownRenderer(colored_output=True)
+    
+    started = time.perf_counter()
+    element = renderer.parser.parse(source)[0]
+    parse_seconds = time.perf_counter() - started
+    
+    stream = PieceCounter()
+    started = time.perf_counter()
+    for piece in renderer._iter_render_table(element):
+        stream.write(piece)
+    render_seconds = time.perf_counter() - started
+    
+    stats = renderer.box_tools.table_stats()
+    print(f"rows: {args.rows:,} x {args.columns} columns")
+    print(f"parse:  {parse_seconds:6.2f}s")
+    print(f"render: {render_seconds:6.2f}s  {stats['rows_per_second']:,.0f} rows/s  "
+          f"{stats['cell_cache_hits']:,} cell cache hits")
+    print(f"pieces: {stream.pieces:,}, largest {stream.largest / 1024:,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
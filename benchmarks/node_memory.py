@@ -0,0 +1,83 @@
+"""Memory per document node.
+
+Parses a document made almost entirely of inline markup and reports the
+bytes allocated per MarkdownElement, next to the same tree rebuilt from
+plain ``__dict__`` classes like the ones the parser used before slots.
+
+    python benchmarks/node_memory.py [--paragraphs 2000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import MarkdownElement, MarkdownParser
+
+PARAGRAPH = "**bold** *it* `code` [link](https://example.com) __more__ _em_ " * 20
+
+
+class DictElement:
+    """The element layout before slots: a per-instance __dict__ and a new list for empty content"""
+    
+    def __init__(self, element_type, content=None, level=0, url=None):
+        self.type = element_type
+        self.content = content or []
+        self.level = level
+        self.url = url
+
+
+def count_nodes(items):
+    count = 0
+    for item in items:
+        if isinstance(item, MarkdownElement):
+            count += 1
+            if not isinstance(item.content, str):
+                count += count_nodes(item.content)
+    return count
+
+
+def rebuild(items, node_class):
+    """Copy a parsed tree into ``node_class`` nodes, sharing the original strings"""
+    converted = []
+    for item in items:
+        if isinstance(item, MarkdownElement):
+            content = item.content if isinstance(item.content, str) else rebuild(item.content, node_class)
+            converted.append(node_class(item.type, content, item.level, item.url))
+        else:
+            converted.append(item)
+    return converted
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--paragraphs", type=int, default=2000)
+    args = arg_parser.parse_args()
+    
+    source = "\n\n".join([PARAGRAPH] * args.paragraphs)
+    elements, parsed_bytes = measure(lambda: MarkdownParser().parse(source))
+    nodes = count_nodes(elements)
+    
+    # Both copies share the parsed strings, so they count only nodes and lists
+    _, dict_bytes = measure(lambda: rebuild(elements, DictElement))
+    _, slotted_bytes = measure(lambda: rebuild(elements, MarkdownElement))
+    
+    print(f"nodes: {nodes:,}")
+    print(f"parsed tree (text included): {parsed_bytes / nodes:8.1f} bytes/node")
+    print(f"__dict__ nodes:              {dict_bytes / nodes:8.1f} bytes/node")
+    print(f"slotted nodes:               {slotted_bytes / nodes:8.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Time to the first screen of the pager against a full render.
+
+Generates a long prose document, then times opening it in ``Pager`` and
+drawing the first screen, jumping to the last screen, and rendering the
+whole document with ``EnhancedMarkdownRenderer.render``.
+
+    python benchmarks/pager_first_screen.py [--size 2000000] [--height 40]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate
+from pager import Pager
+from renderer import EnhancedMarkdownRenderer
+
+
+def make_renderer() -> EnhancedMarkdownRenderer:
+    renderer = EnhancedMarkdownRenderer(colored_output=True, image_workers=0, theme_seed=0)
+    renderer.terminal_width = renderer.box_tools.terminal_width = 100
+    return renderer
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size", type=int, default=2_000_000, help="document size in characters")
+    arg_parser.add_argument("--height", type=int, default=40, help="screen rows")
+    args = arg_parser.parse_args()
+    
+    source = generate("prose", args.size)
+    print(f"{len(source):,} characters, {source.count(chr(10)):,} lines")
+    
+    started = time.perf_counter()
+    pager = Pager(make_renderer(), source)
+    split = time.perf_counter() - started
+    pager.view(args.height)
+    first = time.perf_counter() - started
+    print(f"pager: {len(pager.blocks):,} blocks split in {split * 1000:.0f} ms, "
+          f"first screen after {first * 1000:.0f} ms ({pager.blocks_rendered} blocks rendered)")
+    
+    started = time.perf_counter()
+    pager.handle("bottom", args.height)
+    pager.view(args.height)
+    print(f"pager: last screen after {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({pager.blocks_rendered} blocks rendered in total)")
+    
+    started = time.perf_counter()
+    make_renderer().render(source)
+    print(f"full render: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Parallel image rendering benchmark.
+
+Writes N generated PNG files to a temporary directory and renders them with
+``TermImageRenderer.render_image`` one after another and then from a thread
+pool, checking that both produce the same text and that every image was
+really drawn rather than replaced by a placeholder. Needs term-image 0.7 or
+later (and so Pillow) installed.
+
+    python benchmarks/parallel_images.py [--images 32] [--threads 8] [--size 640]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renderer import ImageCache, TermImageRenderer
+
+COLUMNS = 80
+
+
+def write_images(directory: str, count: int, size: int) -> list:
+    from PIL import Image
+    
+    paths = []
+    for i in range(count):
+        image = Image.new("RGB", (size, size * 3 // 4))
+        image.putdata([((x * 7 + i) % 256, (y * 3) % 256, (x ^ y) % 256)
+                       for y in range(image.height) for x in range(image.width)])
+        path = os.path.join(directory, f"image-{i}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def placeholder(rendered: str, path: str) -> bool:
+    """Whether ``render_image`` gave up on drawing the image and fell back to text"""
+    return rendered.startswith("[Image") or rendered.endswith(f"[caption ({path})]")
+
+
+def render_all(paths: list, threads: int) -> tuple:
+    renderer = TermImageRenderer(ImageCache())
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            rendered = list(executor.map(lambda path: renderer.render_image(path, "caption", COLUMNS), paths))
+    else:
+        rendered = [renderer.render_image(path, "caption", COLUMNS) for path in paths]
+    return rendered, time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--images", type=int, default=32)
+    arg_parser.add_argument("--threads", type=int, default=8)
+    arg_parser.add_argument("--size", type=int, default=640)
+    args = arg_parser.parse_args()
+    
+    if not TermImageRenderer().can_render_images():
+        print("term-image is not installed", file=sys.stderr)
+        return 1
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_images(directory, args.images, args.size)
+        serial, serial_seconds = render_all(paths, 1)
+        parallel, parallel_seconds = render_all(paths, args.threads)
+    
+    print(f"{args.images} images of {args.size}px, {COLUMNS} columns")
+    print(f"serial:     {serial_seconds:6.2f}s")
+    print(f"{args.threads} threads: {parallel_seconds:6.2f}s  ({serial_seconds / parallel_seconds:.1f}x)")
+    print(f"identical output: {serial == parallel}")
+    
+    failed = [path for path, rendered in zip(paths * 2, serial + parallel) if placeholder(rendered, path)]
+    if failed:
+        print(f"FAIL: {len(failed)} renders fell back to a placeholder, e.g. {failed[0]}")
+        return 1
+    return 1 if serial != parallel else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
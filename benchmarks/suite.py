@@ -0,0 +1,195 @@
+"""Parse and render benchmark suite.
+
+For every corpus kind (see corpus.py) this measures ``MarkdownParser.parse``,
+each ``BoxDrawing`` method and ``EnhancedMarkdownRenderer.render``:
+throughput over whole documents, latency percentiles over single blocks or
+calls, and peak traced memory. Results are printed as JSON, so runs can be
+stored and compared.
+
+Highlighting runs with an empty highlight cache and images without
+prefetching, so every call does its full work.
+
+    python benchmarks/suite.py [--size 200000] [--repeat 5] [--seed 0]
+                               [--kinds prose,code,...] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import KINDS, generate
+from parser import ElementType, MarkdownParser
+from renderer import EnhancedMarkdownRenderer, HighlightCache
+
+WIDTH = 100
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_stats(latencies_ns: list) -> dict:
+    ordered = sorted(latencies_ns)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "calls_per_second": len(ordered) / (total / 1e9) if total else 0.0,
+        "p50_ms": percentile(ordered, 0.50) / 1e6,
+        "p90_ms": percentile(ordered, 0.90) / 1e6,
+        "p99_ms": percentile(ordered, 0.99) / 1e6,
+        "max_ms": (ordered[-1] / 1e6) if ordered else 0.0,
+    }
+
+
+def peak_memory(run) -> int:
+    """Peak bytes traced while ``run`` executes"""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def timed_calls(function, arguments: list) -> list:
+    latencies = []
+    clock = time.perf_counter_ns
+    for args in arguments:
+        started = clock()
+        function(*args)
+        latencies.append(clock() - started)
+    return latencies
+
+
+def document_stats(run, size: int, repeat: int) -> dict:
+    """Throughput of ``repeat`` runs over a whole document of ``size`` characters"""
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - started)
+    best = min(seconds)
+    return {
+        "runs": repeat,
+        "best_seconds": best,
+        "median_seconds": sorted(seconds)[len(seconds) // 2],
+        "mb_per_second": size / best / 1e6 if best else 0.0,
+    }
+
+
+def make_renderer() -> EnhancedMarkdownRenderer:
+    renderer = EnhancedMarkdownRenderer(colored_output=True, highlight_cache=HighlightCache(max_entries=0),
+                                        image_workers=0, theme_seed=0)
+    renderer.terminal_width = renderer.box_tools.terminal_width = WIDTH
+    return renderer
+
+
+def box_calls(renderer: EnhancedMarkdownRenderer, elements: list) -> dict:
+    """Arguments for each BoxDrawing method, taken from the document's own elements"""
+    inline = renderer._render_inline_content
+    calls = {name: [] for name in (
+        "fancy_box", "h2_decoration", "h3_decoration", "h4_decoration", "highlight", "code_block_box",
+        "blockquote_decoration", "horizontal_rule", "comment_box", "table_box",
+    )}
+    for element in elements:
+        kind = element.type
+        if kind == ElementType.HEADING:
+            text = inline(element.content)
+            if not text:
+                continue
+            name = {1: "fancy_box", 2: "h2_decoration", 3: "h3_decoration"}.get(element.level, "h4_decoration")
+            calls[name].append((text, element.level - 3) if name == "h4_decoration" else (text,))
+        elif kind == ElementType.CODE_BLOCK:
+            calls["code_block_box"].append((element.content, element.language))
+            if element.language:
+                calls["highlight"].append((element.content, element.language))
+        elif kind == ElementType.BLOCKQUOTE:
+            calls["blockquote_decoration"].append((inline(element.content),))
+        elif kind in (ElementType.DASH_RULE, ElementType.ASTERISK_RULE, ElementType.UNDERSCORE_RULE):
+            calls["horizontal_rule"].append(())
+        elif kind == ElementType.COMMENT:
+            calls["comment_box"].append((element.content,))
+        elif kind == ElementType.TABLE:
+            calls["table_box"].append((element.content,))
+    # Rules are rare in the corpus, so always time a few of each style
+    calls["horizontal_rule"] += [("normal",), ("heavy",), ("double",)] * 10
+    return calls
+
+
+def bench_kind(kind: str, size: int, repeat: int, seed: int) -> dict:
+    source = generate(kind, size, seed)
+    parser = MarkdownParser()
+    blocks = [(block,) for block in parser.split_blocks(source)]
+    result = {"document_chars": len(source), "blocks": len(blocks)}
+    
+    parse = document_stats(lambda: MarkdownParser().parse(source), len(source), repeat)
+    parse.update(latency_stats(timed_calls(MarkdownParser().parse, blocks)))
+    parse["peak_memory_bytes"] = peak_memory(lambda: MarkdownParser().parse(source))
+    result["parse"] = parse
+    
+    renderer = make_renderer()
+    elements = parser.parse(source)
+    box_tools = renderer.box_tools
+    result["box_drawing"] = {}
+    for name, arguments in box_calls(renderer, elements).items():
+        if not arguments:
+            continue
+        method = getattr(box_tools, name)
+        stats = latency_stats(timed_calls(method, arguments))
+        stats["peak_memory_bytes"] = peak_memory(lambda: [method(*args) for args in arguments])
+        result["box_drawing"][name] = stats
+    
+    render = document_stats(lambda: make_renderer().render(source), len(source), repeat)
+    render.update(latency_stats(timed_calls(make_renderer().render, blocks)))
+    render["peak_memory_bytes"] = peak_memory(lambda: make_renderer().render(source))
+    result["render"] = render
+    return result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size", type=int, default=200_000, help="characters per generated document")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="whole-document runs for throughput")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated corpus kinds")
+    arg_parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = arg_parser.parse_args()
+    
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    for kind in kinds:
+        if kind not in KINDS:
+            arg_parser.error(f"unknown kind {kind!r} (choose from {', '.join(KINDS)})")
+    
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "width": WIDTH,
+        "results": {},
+    }
+    for kind in kinds:
+        print(f"benchmarking {kind}...", file=sys.stderr)
+        report["results"][kind] = bench_kind(kind, args.size, args.repeat, args.seed)
+    
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
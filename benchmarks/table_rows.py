@@ -0,0 +1,73 @@
+"""Table row splitting micro-benchmark.
+
+Splits the rows of wide CSV-style tables with ``_split_table_row`` and with
+the previous character-by-character splitter (copied below), for plain rows
+and for rows with escapes and code spans.
+
+    python benchmarks/table_rows.py [--rows 20000] [--columns 24]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import MarkdownParser
+
+
+def previous_split_table_row(row):
+    if row.strip().startswith('|'):
+        row = row.strip()[1:]
+    if row.strip().endswith('|'):
+        row = row.strip()[:-1]
+    
+    cells = []
+    current_cell = ""
+    escape_active = False
+    for char in row:
+        if char == '\\' and not escape_active:
+            escape_active = True
+            continue
+        
+        if char == '|' and not escape_active:
+            cells.append(current_cell)
+            current_cell = ""
+        else:
+            current_cell += char
+            escape_active = False
+    
+    cells.append(current_cell)
+    return cells
+
+
+def rows(count: int, columns: int, styled: bool) -> list:
+    rnd = random.Random(0)
+    values = ["42", "3.1415", "2024-01-31", "ok", "a longer text value", "-"]
+    if styled:
+        values += ["a \\| b", "`x | y`", "`C:\\tmp`"]
+    return ["| " + " | ".join(rnd.choice(values) for _ in range(columns)) + " |" for _ in range(count)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=20000)
+    arg_parser.add_argument("--columns", type=int, default=24)
+    args = arg_parser.parse_args()
+    
+    split = MarkdownParser()._split_table_row
+    print(f"{'rows':>14} {'previous ms':>12} {'current ms':>11} {'speedup':>8}")
+    for label, styled in (("plain", False), ("escapes/code", True)):
+        sample = rows(args.rows, args.columns, styled)
+        previous = min(timeit.repeat(lambda: [previous_split_table_row(row) for row in sample], number=1, repeat=3))
+        current = min(timeit.repeat(lambda: [split(row) for row in sample], number=1, repeat=3))
+        print(f"{label:>14} {previous * 1000:12.1f} {current * 1000:11.1f} {previous / current:7.1f}x")
+    
+    source = "\n".join(rows(args.rows, args.columns, False)[:1] + ["|" + "---|" * args.columns] + rows(args.rows, args.columns, False))
+    parse = min(timeit.repeat(lambda: MarkdownParser().parse(source), number=1, repeat=3))
+    print(f"whole table parse: {parse * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
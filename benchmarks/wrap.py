@@ -0,0 +1,63 @@
+"""Styled wrapping benchmark.
+
+Renders long, heavily formatted paragraphs to ANSI text and compares the
+time of ``textwrap.fill`` (the previous path) with ``layout.fill``. Because
+textwrap counts escape codes as columns, its lines come out short rather
+than long, so for each path the benchmark also reports the line count and
+how many lines are under-filled: lines, other than the last, that leave
+room for the next line's first word.
+
+    python benchmarks/wrap.py
+"""
+import os
+import sys
+import textwrap
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout
+from renderer import EnhancedMarkdownRenderer
+
+WIDTH = 76
+
+CHUNK = (
+    "Deploys use **blue/green** slots with *gradual* traffic shifts; run `make release` "
+    "and watch the [dashboard](https://example.com/d) — **never** skip the *canary* step "
+    "for `prod` and read the 日本語 notes. "
+)
+
+
+def styled_paragraph(repeat: int) -> str:
+    renderer = EnhancedMarkdownRenderer(colored_output=True)
+    element = renderer.parser.parse(CHUNK * repeat)[0]
+    return renderer._render_inline_content(element.content)
+
+
+def underfilled(lines, width):
+    """Lines that had room for the first word of the following line"""
+    count = 0
+    for line, following in zip(lines, lines[1:]):
+        first_word = following.split(" ", 1)[0]
+        if layout.visible_width(line) + 1 + layout.visible_width(first_word) <= width:
+            count += 1
+    return count
+
+
+def main():
+    print(f"{'chars':>9} {'textwrap ms':>12} {'layout ms':>10} {'tw/layout':>10} "
+          f"{'lines (tw/layout)':>18} {'under-filled (tw/layout)':>25}")
+    for repeat in (10, 100, 1000):
+        text = styled_paragraph(repeat)
+        runs = max(1, 2000 // repeat)
+        old = min(timeit.repeat(lambda: textwrap.fill(text, width=WIDTH), number=runs, repeat=3)) / runs
+        new = min(timeit.repeat(lambda: layout.fill(text, WIDTH), number=runs, repeat=3)) / runs
+        old_lines = textwrap.wrap(text, width=WIDTH)
+        new_lines = layout.wrap(text, WIDTH)
+        print(f"{len(text):>9,} {old * 1000:>12.2f} {new * 1000:>10.2f} {old / new:>9.2f}x "
+              f"{len(old_lines):>12}/{len(new_lines):<5} "
+              f"{underfilled(old_lines, WIDTH):>19}/{underfilled(new_lines, WIDTH)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Long-running render daemon on a Unix domain socket, and its thin client.
+
+The daemon keeps ``EnhancedMarkdownRenderer`` instances, with their lexers,
+themes and highlight caches, alive between requests. The client imports
+nothing but the standard library, so a render through a running daemon
+skips the renderer's import and warm-up; when no daemon answers it renders
+in-process instead.
+
+Each message is a header frame (JSON) followed by a body frame, and each
+frame is a 4-byte big-endian length and that many bytes. A render request's
+header holds ``width``, ``color``, ``theme_seed`` and ``cwd`` and its body
+is the UTF-8 source; the reply's header is ``{"ok": true}`` or
+``{"ok": false, "error": ...}`` and its body the rendered text.
+
+    python daemon.py --serve [--socket PATH] [--theme-seed N] [--cache]
+    python daemon.py [FILE] [--color auto|always|never] [--width N]
+    python daemon.py --stop
+"""
+import json
+import os
+import shutil
+import socket
+import stat
+import struct
+import sys
+from typing import Optional, Tuple
+
+_LENGTH = struct.Struct(">I")
+# Largest frame either side accepts
+MAX_FRAME = 256 * 1024 * 1024
+# Seconds the daemon waits on a silent client before dropping it
+CLIENT_TIMEOUT = 5.0
+# Seconds a client waits to connect, and then for each read of the reply
+CONNECT_TIMEOUT = 1.0
+RENDER_TIMEOUT = 30.0
+# Most renderers the daemon keeps warm; the least recently used is dropped first
+MAX_RENDERERS = 16
+
+
+def _fallback_dir() -> str:
+    return os.path.join("/tmp", f"sombrero-{os.getuid()}")
+
+
+def default_socket_path() -> str:
+    """The per-user socket, under XDG_RUNTIME_DIR when it is set, else in a private directory in /tmp"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "sombrero.sock")
+    return os.path.join(_fallback_dir(), "daemon.sock")
+
+
+def _is_own_socket(path: str) -> bool:
+    """Whether ``path`` is a socket owned by this user, so not one planted by someone else"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _make_private_dir(directory: str) -> None:
+    """Create ``directory`` readable only by this user, or check that it already is"""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    except OSError as e:
+        raise RuntimeError(f"cannot create {directory}: {e}") from e
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"{directory} is not a directory private to this user")
+
+
+def _send_frame(sock: socket.socket, data: bytes) -> None:
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed mid-frame")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME:
+        raise ConnectionError(f"frame of {size} bytes is over the {MAX_FRAME} byte limit")
+    return _recv_exact(sock, size)
+
+
+def _send_message(sock: socket.socket, header: dict, body: bytes = b"") -> None:
+    _send_frame(sock, json.dumps(header).encode("utf-8"))
+    _send_frame(sock, body)
+
+
+def _recv_message(sock: socket.socket) -> Tuple[dict, bytes]:
+    header = json.loads(_recv_frame(sock))
+    if not isinstance(header, dict):
+        raise ValueError(f"message header is a JSON {type(header).__name__}, not an object")
+    return header, _recv_frame(sock)
+
+
+class RenderDaemon:
+    """Serves render requests one at a time on a Unix socket.
+    
+    One renderer is kept per (color, theme seed) pair, for at most
+    ``MAX_RENDERERS`` pairs. Requests without a theme seed use the daemon's
+    own, so every render of a daemon's lifetime shares the same heading
+    colors. All renderers share one highlight cache, kept on disk too when
+    ``highlight_cache_dir`` is given. Requests without a width or directory
+    get the daemon's, never those of an earlier request.
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None, theme_seed: Optional[int] = None,
+                 highlight_cache_dir: Optional[str] = None):
+        import random
+        from collections import OrderedDict
+        
+        self.socket_path = socket_path or default_socket_path()
+        self.theme_seed = random.randrange(2 ** 32) if theme_seed is None else theme_seed
+        self.highlight_cache_dir = highlight_cache_dir
+        self.default_width = shutil.get_terminal_size()[0]
+        self.cwd = os.getcwd()
+        self.requests = 0
+        self._renderers = OrderedDict()
+        self._highlight_cache = None
+    
+    def renderer(self, colored_output: bool, theme_seed: int):
+        key = (colored_output, theme_seed)
+        renderer = self._renderers.get(key)
+        if renderer is not None:
+            self._renderers.move_to_end(key)
+        else:
+            from renderer import EnhancedMarkdownRenderer, HighlightCache
+            
+            if self._highlight_cache is None:
+                self._highlight_cache = HighlightCache(cache_dir=self.highlight_cache_dir)
+            renderer = self._renderers[key] = EnhancedMarkdownRenderer(colored_output, theme_seed=theme_seed,
+                                                                       highlight_cache=self._highlight_cache)
+            if len(self._renderers) > MAX_RENDERERS:
+                self._renderers.popitem(last=False)
+        return renderer
+    
+    def warm_up(self) -> None:
+        """Build the default renderers and load Pygments before the first request arrives"""
+        from renderer import LexerPool
+        
+        LexerPool._aliases()
+        for colored_output in (True, False):
+            box_tools = self.renderer(colored_output, self.theme_seed).box_tools
+            box_tools.lexer_pool.formatter(box_tools.code_style)
+    
+    def handle(self, header: dict, body: bytes) -> Tuple[dict, bytes]:
+        """The reply to one request"""
+        command = header.get("command", "render")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid(), "requests": self.requests}, b""
+        if command != "render":
+            return {"ok": False, "error": f"unknown command {command!r}"}, b""
+        
+        seed = header.get("theme_seed")
+        renderer = self.renderer(bool(header.get("color", True)), self.theme_seed if seed is None else seed)
+        width = int(header.get("width") or self.default_width)
+        renderer.terminal_width = renderer.box_tools.terminal_width = width
+        # Image paths are relative to the client's directory
+        cwd = header.get("cwd")
+        os.chdir(cwd if isinstance(cwd, str) and os.path.isdir(cwd) else self.cwd)
+        
+        self.requests += 1
+        return {"ok": True}, renderer.render(body.decode("utf-8")).encode("utf-8")
+    
+    def _listen(self) -> socket.socket:
+        path = self.socket_path
+        if os.path.dirname(os.path.abspath(path)) == _fallback_dir():
+            _make_private_dir(_fallback_dir())
+        if os.path.lexists(path):
+            # Never ping or remove a file someone else put there
+            if not _is_own_socket(path):
+                raise RuntimeError(f"{path} exists and is not a socket owned by this user")
+            if request({"command": "ping"}, socket_path=path, timeout=1.0) is not None:
+                raise RuntimeError(f"a daemon is already listening on {path}")
+            try:
+                os.unlink(path)
+            except OSError as e:
+                raise RuntimeError(f"cannot remove stale socket {path}: {e}") from e
+        
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the owner may connect
+        umask = os.umask(0o177)
+        try:
+            server.bind(path)
+        except OSError as e:
+            server.close()
+            raise RuntimeError(f"cannot listen on {path}: {e}") from e
+        finally:
+            os.umask(umask)
+        server.listen(16)
+        return server
+    
+    def serve_forever(self) -> None:
+        """Accept and answer requests until a shutdown request arrives"""
+        server = self._listen()
+        self.warm_up()
+        try:
+            while True:
+                conn, _ = server.accept()
+                # Requests are served one at a time, so a stalled client must not hold up the rest
+                conn.settimeout(CLIENT_TIMEOUT)
+                with conn:
+                    try:
+                        header, body = _recv_message(conn)
+                        if header.get("command") == "shutdown":
+                            _send_message(conn, {"ok": True})
+                            return
+                        try:
+                            reply, rendered = self.handle(header, body)
+                        except Exception as e:
+                            reply, rendered = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+                        _send_message(conn, reply, rendered)
+                    except (OSError, ValueError):
+                        # A client that went away or sent garbage does not stop the daemon
+                        continue
+        finally:
+            server.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+def request(header: dict, body: bytes = b"", socket_path: Optional[str] = None,
+            timeout: Optional[float] = RENDER_TIMEOUT) -> Optional[Tuple[dict, bytes]]:
+    """Send one request to the daemon; None when no daemon answers.
+    
+    Connecting may take ``CONNECT_TIMEOUT`` and each later socket operation
+    ``timeout`` seconds; a daemon that is missing, refuses the connection,
+    times out or drops it counts as no daemon, as does a path that is not a
+    socket owned by this user.
+    """
+    socket_path = socket_path or default_socket_path()
+    if not _is_own_socket(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT if timeout is None else min(timeout, CONNECT_TIMEOUT))
+        sock.connect(socket_path)
+        sock.settimeout(timeout)
+        _send_message(sock, header, body)
+        return _recv_message(sock)
+    except (OSError, ValueError):
+        # OSError covers timeouts and refused or reset connections, ValueError a garbled reply
+        return None
+    finally:
+        sock.close()
+
+
+def render_via_daemon(source: str, width: int, colored_output: bool = True, theme_seed: Optional[int] = None,
+                      socket_path: Optional[str] = None, timeout: Optional[float] = RENDER_TIMEOUT) -> Optional[str]:
+    """Render ``source`` in the daemon; None when no daemon answers within ``timeout`` seconds.
+    
+    Raises RuntimeError when the daemon answers with an error.
+    """
+    header = {"width": width, "color": colored_output, "theme_seed": theme_seed, "cwd": os.getcwd()}
+    reply = request(header, source.encode("utf-8"), socket_path, timeout)
+    if reply is None:
+        return None
+    header, body = reply
+    if not header.get("ok"):
+        raise RuntimeError(header.get("error", "render failed"))
+    return body.decode("utf-8")
+
+
+def render(source: str, width: int, colored_output: bool = True, theme_seed: Optional[int] = None,
+           socket_path: Optional[str] = None) -> str:
+    """Render through the daemon when one answers, else in this process"""
+    rendered = render_via_daemon(source, width, colored_output, theme_seed, socket_path)
+    if rendered is not None:
+        return rendered
+    
+    from renderer import EnhancedMarkdownRenderer
+    
+    renderer = EnhancedMarkdownRenderer(colored_output, theme_seed=theme_seed)
+    renderer.terminal_width = renderer.box_tools.terminal_width = width
+    return renderer.render(source)
+
+
+def main(argv=None) -> int:
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(description="Render Markdown through a warm render daemon.")
+    arg_parser.add_argument("input", nargs="?", help="Markdown file to render (standard input when omitted or -)")
+    arg_parser.add_argument("--serve", action="store_true", help="run the daemon in the foreground")
+    arg_parser.add_argument("--stop", action="store_true", help="ask a running daemon to exit")
+    arg_parser.add_argument("--socket", help=f"socket path (default {default_socket_path()})")
+    arg_parser.add_argument("--color", choices=("auto", "always", "never"), default="auto",
+                            help="colorize output (auto: only when stdout is a terminal)")
+    arg_parser.add_argument("--width", type=int, help="render width (default: the terminal width)")
+    arg_parser.add_argument("--theme-seed", type=int, help="seed for the heading colors (default: the daemon's)")
+    arg_parser.add_argument("--cache", action="store_true",
+                            help="with --serve, keep highlighted code in the on-disk cache across restarts")
+    args = arg_parser.parse_args(argv)
+    
+    if args.serve:
+        try:
+            highlight_cache_dir = None
+            if args.cache:
+                from renderer import HighlightCache
+                
+                highlight_cache_dir = HighlightCache.default_dir()
+            RenderDaemon(args.socket, args.theme_seed, highlight_cache_dir).serve_forever()
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            pass
+        return 0
+    
+    if args.stop:
+        if request({"command": "shutdown"}, socket_path=args.socket) is None:
+            print("No daemon is running.", file=sys.stderr)
+            return 1
+        return 0
+    
+    if args.input and args.input != "-":
+        try:
+            with open(args.input, "r") as md_file:
+                source = md_file.read()
+        except FileNotFoundError:
+            print(f"Error: File '{args.input}' not found.")
+            return 1
+    else:
+        source = sys.stdin.read()
+    
+    colored_output = sys.stdout.isatty() if args.color == "auto" else args.color == "always"
+    width = args.width or shutil.get_terminal_size()[0]
+    try:
+        sys.stdout.write(render(source, width, colored_output, args.theme_seed, args.socket))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
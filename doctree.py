@@ -0,0 +1,351 @@
+"""Flat, array-backed document tree for very large documents.
+
+``MarkdownParser`` builds a graph of lists, strings and ``MarkdownElement``
+objects. ``FlatTree`` holds the same document in a handful of parallel
+arrays (node kind, parent, first child, next sibling, level and a start/end
+offset) plus a single text buffer, so a document costs a fixed number of
+bytes per node and a copy of its text, and there is nothing for the garbage
+collector to traverse.
+
+Text is written to the buffer in document order, so the plain text of any
+node (all the text below it, links without their urls) is one slice.
+Nodes are visited through ``Cursor`` objects or a ``TreeVisitor``, and
+``FlatTree.element`` turns one node back into the ``MarkdownElement`` the
+parser would have produced.
+"""
+from array import array
+from io import StringIO
+from itertools import chain
+from typing import IO, Iterable, Iterator, List, Optional, Union
+
+from parser import ElementType, MarkdownElement, MarkdownParser, Table, TableCell
+
+# Node kinds without an ElementType; ElementType nodes use the enum value
+TEXT_RUN = 0
+LIST_ITEM = 64
+TABLE_ROW = 65
+TABLE_CELL = 66
+
+_ELEMENT_TYPES = {element_type.value: element_type for element_type in ElementType}
+_KIND_NAMES = {TEXT_RUN: 'text_run', LIST_ITEM: 'list_item', TABLE_ROW: 'table_row', TABLE_CELL: 'table_cell'}
+_KIND_NAMES.update({element_type.value: element_type.name.lower() for element_type in ElementType})
+
+# Element types whose content is a string rather than child elements
+_TEXT_TYPES = frozenset((ElementType.CODE, ElementType.CODE_BLOCK, ElementType.COMMENT))
+_LIST_TYPES = frozenset((ElementType.DASH_LIST, ElementType.ASTERISK_LIST, ElementType.PLUS_LIST, ElementType.ORDERED_LIST))
+
+# Table cells keep their alignment in the level array
+_ALIGNMENT_CODES = {None: 0, 'left': 1, 'center': 2, 'right': 3}
+_ALIGNMENTS = {code: alignment for alignment, code in _ALIGNMENT_CODES.items()}
+
+
+def _iter_source_lines(text: str) -> Iterator[str]:
+    """Yield the lines of ``text`` with their newlines, like a file object, without splitting it all at once"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            if start < len(text):
+                yield text[start:]
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+
+class FlatTree:
+    """A parsed document stored as parallel arrays indexed by node number.
+    
+    Top-level blocks are roots linked through ``next_siblings``; -1 marks a
+    missing parent, child or sibling.
+    """
+    
+    def __init__(self):
+        self.kinds = array('B')
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.levels = array('b')
+        self.starts = array('q')
+        self.ends = array('q')
+        # Sparse attributes, keyed by node
+        self.urls = {}
+        self.languages = {}
+        self.alignments = {}
+        self.first_root = -1
+        self._last_root = -1
+        self._buffer = StringIO()
+        self._length = 0
+        self._text = ''
+    
+    @classmethod
+    def parse(cls, source: Union[str, IO[str]], parser: Optional[MarkdownParser] = None) -> 'FlatTree':
+        """Parse Markdown text or a file object into a flat tree.
+        
+        Blocks are parsed and flattened one at a time, so the element objects
+        of only one block exist at any moment.
+        """
+        parser = parser or MarkdownParser()
+        if isinstance(source, str):
+            source = _iter_source_lines(source)
+        tree = cls()
+        tree.extend(parser.iter_parse(source))
+        return tree
+    
+    @property
+    def text(self) -> str:
+        """The text buffer every node's offsets point into"""
+        if len(self._text) != self._length:
+            self._text = self._buffer.getvalue()
+        return self._text
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the node arrays, not counting the text buffer and sparse attributes"""
+        arrays = (self.kinds, self.parents, self.first_children, self.next_siblings, self.levels, self.starts, self.ends)
+        return sum(len(values) * values.itemsize for values in arrays)
+    
+    def extend(self, elements: Iterable[MarkdownElement]) -> None:
+        for element in elements:
+            self.append(element)
+    
+    def append(self, element: MarkdownElement) -> int:
+        """Flatten a block element as a new root; returns its node"""
+        node = self._append_element(element, -1)
+        if self._last_root == -1:
+            self.first_root = node
+        else:
+            self.next_siblings[self._last_root] = node
+        self._last_root = node
+        return node
+    
+    def _new_node(self, kind: int, parent: int, previous: int, level: int = 0) -> int:
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+        self.levels.append(level)
+        self.starts.append(self._length)
+        self.ends.append(self._length)
+        if previous != -1:
+            self.next_siblings[previous] = node
+        elif parent != -1:
+            self.first_children[parent] = node
+        return node
+    
+    def _write(self, text: str) -> None:
+        self._buffer.write(text)
+        self._length += len(text)
+    
+    def _append_element(self, element: MarkdownElement, parent: int, previous: int = -1) -> int:
+        element_type = element.type
+        content = element.content
+        node = self._new_node(element_type.value, parent, previous, element.level)
+        if element.url is not None:
+            self.urls[node] = element.url
+        if element.language is not None:
+            self.languages[node] = element.language
+        
+        if isinstance(content, str):
+            self._write(content)
+        elif element_type == ElementType.TABLE:
+            self._append_table(content, node)
+        elif element_type in _LIST_TYPES:
+            item_node = -1
+            for item in content:
+                item_node = self._new_node(LIST_ITEM, node, item_node)
+                self._append_inline(item, item_node)
+                self.ends[item_node] = self._length
+        else:
+            self._append_inline(content, node)
+        
+        self.ends[node] = self._length
+        return node
+    
+    def _append_inline(self, content: Iterable[Union[str, MarkdownElement]], parent: int) -> None:
+        child = -1
+        for item in content:
+            if isinstance(item, str):
+                child = self._new_node(TEXT_RUN, parent, child)
+                self._write(item)
+                self.ends[child] = self._length
+            else:
+                child = self._append_element(item, parent, child)
+    
+    def _append_table(self, table: Table, parent: int) -> None:
+        self.alignments[parent] = tuple(table.alignments)
+        row_node = -1
+        for row in chain((table.headers,), table.rows):
+            row_node = self._new_node(TABLE_ROW, parent, row_node, int(row is table.headers))
+            cell_node = -1
+            for cell in row:
+                cell_node = self._new_node(TABLE_CELL, row_node, cell_node, _ALIGNMENT_CODES[cell.alignment])
+                self._append_inline(cell.content, cell_node)
+                self.ends[cell_node] = self._length
+            self.ends[row_node] = self._length
+    
+    def roots(self) -> Iterator[int]:
+        """Yield the node of each top-level block in document order"""
+        node = self.first_root
+        next_siblings = self.next_siblings
+        while node != -1:
+            yield node
+            node = next_siblings[node]
+    
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_children[node]
+        next_siblings = self.next_siblings
+        while child != -1:
+            yield child
+            child = next_siblings[child]
+    
+    def text_of(self, node: int) -> str:
+        """All text below ``node``, the equivalent of the renderer's plain text"""
+        return self.text[self.starts[node]:self.ends[node]]
+    
+    def cursor(self, node: Optional[int] = None) -> Optional['Cursor']:
+        """A cursor on ``node``, or on the first block; None for an empty tree"""
+        if node is None:
+            node = self.first_root
+        return Cursor(self, node) if node != -1 else None
+    
+    def element(self, node: int) -> Union[str, MarkdownElement]:
+        """Rebuild the parser's object for ``node``: a string for text runs, else a MarkdownElement"""
+        kind = self.kinds[node]
+        if kind == TEXT_RUN:
+            return self.text_of(node)
+        element_type = _ELEMENT_TYPES[kind]
+        
+        if element_type in _TEXT_TYPES:
+            content = self.text_of(node)
+        elif element_type == ElementType.TABLE:
+            content = self._table(node)
+        elif element_type in _LIST_TYPES:
+            content = [self._elements(item) for item in self.children(node)]
+        else:
+            content = self._elements(node)
+        
+        return MarkdownElement(element_type, content, self.levels[node], self.urls.get(node), self.languages.get(node))
+    
+    def _elements(self, node: int) -> List[Union[str, MarkdownElement]]:
+        return [self.element(child) for child in self.children(node)]
+    
+    def _table(self, node: int) -> Table:
+        headers = []
+        rows = []
+        for row_node in self.children(node):
+            row = [
+                TableCell(self._elements(cell), self.levels[row_node] == 1, _ALIGNMENTS[self.levels[cell]])
+                for cell in self.children(row_node)
+            ]
+            if self.levels[row_node]:
+                headers = row
+            else:
+                rows.append(row)
+        return Table(headers, rows, list(self.alignments[node]))
+    
+    def iter_elements(self) -> Iterator[MarkdownElement]:
+        """Yield each top-level block as a MarkdownElement, building one at a time"""
+        for node in self.roots():
+            yield self.element(node)
+
+
+class Cursor:
+    """A position in a FlatTree; navigating returns a new cursor, or None where there is no node"""
+    __slots__ = ('tree', 'node')
+    
+    def __init__(self, tree: FlatTree, node: int):
+        self.tree = tree
+        self.node = node
+    
+    def __repr__(self) -> str:
+        return f"Cursor({self.name}, node={self.node})"
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Cursor) and other.tree is self.tree and other.node == self.node
+    
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.node))
+    
+    @property
+    def kind(self) -> int:
+        return self.tree.kinds[self.node]
+    
+    @property
+    def type(self) -> Optional[ElementType]:
+        """The ElementType of the node, or None for text runs, list items and table rows and cells"""
+        return _ELEMENT_TYPES.get(self.tree.kinds[self.node])
+    
+    @property
+    def name(self) -> str:
+        """Lower-case kind name, as used by TreeVisitor methods"""
+        return _KIND_NAMES[self.tree.kinds[self.node]]
+    
+    @property
+    def text(self) -> str:
+        return self.tree.text_of(self.node)
+    
+    @property
+    def level(self) -> int:
+        return self.tree.levels[self.node]
+    
+    @property
+    def url(self) -> Optional[str]:
+        return self.tree.urls.get(self.node)
+    
+    @property
+    def language(self) -> Optional[str]:
+        return self.tree.languages.get(self.node)
+    
+    @property
+    def alignment(self) -> Optional[str]:
+        """Column alignment of a table cell"""
+        return _ALIGNMENTS[self.tree.levels[self.node]] if self.kind == TABLE_CELL else None
+    
+    def _at(self, node: int) -> Optional['Cursor']:
+        return Cursor(self.tree, node) if node != -1 else None
+    
+    @property
+    def parent(self) -> Optional['Cursor']:
+        return self._at(self.tree.parents[self.node])
+    
+    @property
+    def first_child(self) -> Optional['Cursor']:
+        return self._at(self.tree.first_children[self.node])
+    
+    @property
+    def next_sibling(self) -> Optional['Cursor']:
+        return self._at(self.tree.next_siblings[self.node])
+    
+    def children(self) -> Iterator['Cursor']:
+        tree = self.tree
+        for child in tree.children(self.node):
+            yield Cursor(tree, child)
+    
+    def element(self) -> Union[str, MarkdownElement]:
+        return self.tree.element(self.node)
+
+
+class TreeVisitor:
+    """Walks a FlatTree like ``ast.NodeVisitor``.
+    
+    ``visit`` calls ``visit_<name>`` for the cursor's kind name (for example
+    ``visit_paragraph``, ``visit_link`` or ``visit_text_run``) when the
+    subclass defines it, else ``generic_visit``, which visits the children.
+    """
+    
+    def visit(self, cursor: Cursor):
+        method = getattr(self, 'visit_' + cursor.name, self.generic_visit)
+        return method(cursor)
+    
+    def generic_visit(self, cursor: Cursor) -> None:
+        for child in cursor.children():
+            self.visit(child)
+    
+    def visit_tree(self, tree: FlatTree) -> None:
+        """Visit every top-level block of ``tree`` in order"""
+        for node in tree.roots():
+            self.visit(Cursor(tree, node))
@@ -0,0 +1,157 @@
+"""Width measurement and word wrapping for text that already carries ANSI styling.
+
+Escape sequences take no columns, East Asian wide characters and emoji take
+two, and combining marks take none. ``wrap`` follows ``textwrap.wrap``
+(whitespace handling, hyphen breaks, long-word splitting) so unstyled ASCII
+text wraps exactly as before, but it measures visible columns and never
+splits a word at a style change.
+"""
+import re
+import textwrap
+import unicodedata
+from functools import lru_cache
+from typing import List, Tuple
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Splitting on a capture group alternates text and escape sequences
+_ANSI_SPLIT = re.compile(r'(\x1b\[[0-9;]*m)')
+_WORD_SEPARATOR = textwrap.TextWrapper.wordsep_re
+_WHITESPACE = str.maketrans({char: ' ' for char in '\t\n\x0b\x0c\r'})
+_OTHER_WHITESPACE = re.compile(r'[\n\x0b\x0c\r]')
+
+
+@lru_cache(maxsize=4096)
+def char_width(char: str) -> int:
+    """Terminal columns taken by a single character"""
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Cf', 'Cc'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def text_width(text: str) -> int:
+    """Terminal columns taken by text without escape sequences"""
+    if text.isascii():
+        return len(text)
+    return sum(map(char_width, text))
+
+
+def visible_width(text: str) -> int:
+    """Terminal columns taken by text, ignoring ANSI style sequences"""
+    if '\x1b' in text:
+        text = ANSI_ESCAPE.sub('', text)
+    return text_width(text)
+
+
+def _split_units(text: str) -> List[tuple]:
+    """Break styled text into (text, width, is_space) units.
+    
+    Escape sequences hold no whitespace, so textwrap's word splitting keeps
+    them inside the neighbouring word and text on both sides of a style
+    change stays one unit.
+    """
+    if '\t' in text:
+        text = text.expandtabs()
+    if _OTHER_WHITESPACE.search(text):
+        text = text.translate(_WHITESPACE)
+    
+    units = []
+    append = units.append
+    for chunk in _WORD_SEPARATOR.split(text):
+        if not chunk:
+            continue
+        if chunk.isascii():
+            if '\x1b' in chunk:
+                append((chunk, len(ANSI_ESCAPE.sub('', chunk)), False))
+            else:
+                append((chunk, len(chunk), chunk[0] == ' ' and not chunk.strip()))
+        else:
+            append((chunk, visible_width(chunk), not chunk.strip()))
+    
+    return units
+
+
+def _split_at_width(text: str, columns: int, at_least_one: bool) -> Tuple[str, str, int]:
+    """Cut styled text after at most ``columns`` visible columns.
+    
+    With ``at_least_one`` the first character is taken even if it is wider
+    than ``columns``, so a wide character on an empty line still makes progress.
+    
+    Returns (head, tail, head width); escape sequences right at the cut stay
+    with the head.
+    """
+    head = []
+    head_width = 0
+    pieces = _ANSI_SPLIT.split(text)
+    
+    for index, piece in enumerate(pieces):
+        if index % 2:
+            head.append(piece)
+            continue
+        for offset, char in enumerate(piece):
+            width = char_width(char)
+            if head_width + width > columns and (head_width > 0 or not at_least_one):
+                tail = piece[offset:] + ''.join(pieces[index + 1:])
+                return ''.join(head), tail, head_width
+            head.append(char)
+            head_width += width
+    
+    return ''.join(head), '', head_width
+
+
+def wrap(text: str, width: int, initial_indent: str = '', subsequent_indent: str = '') -> List[str]:
+    """Wrap styled ``text`` to ``width`` visible columns, like ``textwrap.wrap``"""
+    if width <= 0:
+        raise ValueError(f"invalid width {width!r} (must be > 0)")
+    
+    units = _split_units(text)
+    units.reverse()
+    initial_width = visible_width(initial_indent)
+    subsequent_width = visible_width(subsequent_indent)
+    lines = []
+    
+    while units:
+        if lines:
+            indent, indent_width = subsequent_indent, subsequent_width
+            # Whitespace at the start of a continuation line is dropped
+            if units[-1][2]:
+                del units[-1]
+        else:
+            indent, indent_width = initial_indent, initial_width
+        # textwrap loops forever when the indent fills the line; always leave a column
+        line_width = max(1, width - indent_width)
+        
+        line = []
+        line_length = 0
+        while units and line_length + units[-1][1] <= line_width:
+            unit = units.pop()
+            line.append(unit)
+            line_length += unit[1]
+        
+        if units and units[-1][1] > line_width:
+            space_left = line_width - line_length
+            chunk, chunk_width, _ = units[-1]
+            if '\x1b' not in chunk and chunk.isascii():
+                end = space_left
+                if len(chunk) > space_left:
+                    hyphen = chunk.rfind('-', 0, space_left)
+                    if hyphen > 0 and any(c != '-' for c in chunk[:hyphen]):
+                        end = hyphen + 1
+                head, tail, head_width = chunk[:end], chunk[end:], len(chunk[:end])
+            else:
+                head, tail, head_width = _split_at_width(chunk, space_left, not line)
+            line.append((head, head_width, not head.strip()))
+            units[-1] = (tail, chunk_width - head_width, not tail.strip())
+        
+        if line and line[-1][2]:
+            del line[-1]
+        
+        if line:
+            lines.append(indent + ''.join(unit[0] for unit in line))
+    
+    return lines
+
+
+def fill(text: str, width: int, initial_indent: str = '', subsequent_indent: str = '') -> str:
+    """Wrap styled ``text`` and join the lines, like ``textwrap.fill``"""
+    return '\n'.join(wrap(text, width, initial_indent, subsequent_indent))
@@ -0,0 +1,218 @@
+"""Built-in pager that renders a document only as far as it is viewed.
+
+The source is split into blocks up front, which needs no inline parsing and
+no rendering. A block is parsed and rendered the first time one of its lines
+is on screen, and the rendered lines are kept in a cache bounded by line
+count, so opening a very large document shows the first screen at once and
+scrolling renders a few blocks at a time.
+
+Positions are kept as (block, line within block) rather than as a line
+number, so jumping to the end renders only the last blocks.
+"""
+import codecs
+import os
+import re
+import shutil
+import sys
+from collections import OrderedDict
+from typing import IO, List, Optional, Tuple
+
+# Key sequences read in cbreak mode and the pager action for each
+_KEYS = {
+    "q": "quit", "Q": "quit", "\x1b": "quit",
+    "j": "down", "\n": "down", "\r": "down", "\x1b[B": "down", "\x1bOB": "down",
+    "k": "up", "\x1b[A": "up", "\x1bOA": "up",
+    " ": "page_down", "f": "page_down", "\x1b[6~": "page_down",
+    "b": "page_up", "\x1b[5~": "page_up",
+    "d": "half_down", "u": "half_up",
+    "g": "top", "<": "top", "\x1b[H": "top", "\x1b[1~": "top", "\x1bOH": "top",
+    "G": "bottom", ">": "bottom", "\x1b[F": "bottom", "\x1b[4~": "bottom", "\x1bOF": "bottom",
+}
+
+# One key per match: a CSI or SS3 escape sequence, or a single character
+_KEY_TOKEN = re.compile(r"\x1b\[[0-9;]*[~A-Za-z]|\x1bO.|.", re.DOTALL)
+
+RESET = "\x1b[0m"
+
+
+def split_keys(data: str) -> List[str]:
+    """Split what one read from the terminal returned into separate keys, for keys typed ahead or held down"""
+    return _KEY_TOKEN.findall(data)
+
+
+class Pager:
+    """Scrolls through a document rendered block by block on demand.
+    
+    ``renderer`` is an ``EnhancedMarkdownRenderer``; its parser splits the
+    blocks and its ``terminal_width`` is the width blocks are rendered at.
+    """
+    # Rendered lines kept across all cached blocks; the blocks on screen are always kept
+    CACHE_LINES = 20000
+    
+    def __init__(self, renderer, source: str, cache_lines: Optional[int] = None):
+        self.renderer = renderer
+        self.blocks = renderer.parser.split_blocks(source)
+        self.cache_lines = self.CACHE_LINES if cache_lines is None else cache_lines
+        self._cache = OrderedDict()
+        self._cached_lines = 0
+        self.top = (0, 0)
+        self.blocks_rendered = 0
+        self._last_top = None
+    
+    def block_lines(self, index: int) -> List[str]:
+        """The rendered lines of block ``index``, rendering it if it is not cached"""
+        lines = self._cache.get(index)
+        if lines is not None:
+            self._cache.move_to_end(index)
+            return lines
+        
+        rendered = "".join(self.renderer.iter_render(self.blocks[index]))
+        lines = rendered.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        self.blocks_rendered += 1
+        
+        self._cache[index] = lines
+        self._cached_lines += len(lines)
+        return lines
+    
+    def _trim_cache(self, keep: set) -> None:
+        """Evict least recently viewed blocks, other than ``keep``, until the cache is within its bound"""
+        for index in list(self._cache):
+            if self._cached_lines <= self.cache_lines:
+                return
+            if index not in keep:
+                self._cached_lines -= len(self._cache.pop(index))
+    
+    def clear(self) -> None:
+        """Forget every rendered block, for example after the width changed"""
+        self._cache.clear()
+        self._cached_lines = 0
+        self._last_top = None
+    
+    def forward(self, position: Tuple[int, int], count: int) -> Tuple[int, int]:
+        """The position ``count`` lines after ``position``; (len(blocks), 0) is the end of the document"""
+        block, offset = position
+        while block < len(self.blocks):
+            lines = len(self.block_lines(block))
+            step = min(count, lines - offset)
+            offset += step
+            count -= step
+            if offset < lines:
+                break
+            block += 1
+            offset = 0
+        return block, offset
+    
+    def backward(self, position: Tuple[int, int], count: int) -> Tuple[int, int]:
+        """The position ``count`` lines before ``position``, stopping at the start of the document"""
+        block, offset = position
+        while count > 0:
+            if offset == 0:
+                if block == 0:
+                    break
+                block -= 1
+                offset = len(self.block_lines(block))
+                continue
+            step = min(count, offset)
+            offset -= step
+            count -= step
+        return block, offset
+    
+    def last_top(self, height: int) -> Tuple[int, int]:
+        """The top position that shows the last line of the document on the bottom row"""
+        if self._last_top is None or self._last_top[0] != height:
+            self._last_top = (height, self.backward((len(self.blocks), 0), height))
+        return self._last_top[1]
+    
+    def scroll(self, count: int, height: int) -> None:
+        """Move the top ``count`` lines down (or up when negative), without scrolling past either end"""
+        if count < 0:
+            self.top = self.backward(self.top, -count)
+        else:
+            self.top = max(min(self.forward(self.top, count), self.last_top(height)), (0, 0))
+    
+    def view(self, height: int) -> List[str]:
+        """The ``height`` lines starting at the top position, fewer at the end of the document"""
+        block, offset = self.top
+        lines = []
+        visible = set()
+        while len(lines) < height and block < len(self.blocks):
+            block_lines = self.block_lines(block)
+            visible.add(block)
+            lines.extend(block_lines[offset:offset + height - len(lines)])
+            block += 1
+            offset = 0
+        self._trim_cache(visible)
+        return lines
+    
+    def handle(self, action: str, height: int) -> bool:
+        """Apply a key action; returns False when the pager should quit"""
+        if action == "quit":
+            return False
+        moves = {
+            "down": 1, "up": -1,
+            "page_down": height, "page_up": -height,
+            "half_down": height // 2, "half_up": -(height // 2),
+        }
+        if action in moves:
+            self.scroll(moves[action], height)
+        elif action == "top":
+            self.top = (0, 0)
+        elif action == "bottom":
+            self.top = self.last_top(height)
+        return True
+    
+    def _set_width(self, width: int) -> None:
+        renderer = self.renderer
+        if renderer.terminal_width != width:
+            renderer.terminal_width = renderer.box_tools.terminal_width = width
+            self.clear()
+            # Line offsets differ at the new width, so keep the block and start from its first line
+            self.top = (self.top[0], 0)
+    
+    def _draw(self, stream: IO[str], width: int, height: int, title: str) -> None:
+        lines = self.view(height)
+        out = ["\x1b[H"]
+        for line in lines:
+            out.append(f"{line}{RESET}\x1b[K\r\n")
+        out.append("\x1b[J" if len(lines) < height else "")
+        
+        block = min(self.top[0] + 1, len(self.blocks))
+        percent = 100 * block // len(self.blocks) if self.blocks else 100
+        status = f" {title}  block {block}/{len(self.blocks)} ({percent}%)  q quit, space/b page, g/G top/bottom "
+        out.append(f"\x1b[{height + 1};1H\x1b[7m{status[:width].ljust(width)}{RESET}")
+        stream.write("".join(out))
+        stream.flush()
+    
+    def run(self, stream: Optional[IO[str]] = None, title: str = "") -> None:
+        """Page interactively on the terminal until the user quits.
+        
+        Keys are read from the controlling terminal, so the document itself
+        may have come from standard input.
+        """
+        import termios
+        import tty
+        
+        stream = stream or sys.stdout
+        tty_fd = os.open("/dev/tty", os.O_RDONLY)
+        saved = termios.tcgetattr(tty_fd)
+        # Alternate screen, no cursor and no autowrap while paging
+        stream.write("\x1b[?1049h\x1b[?25l\x1b[?7l")
+        # A read may end inside a multi-byte character
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        try:
+            tty.setcbreak(tty_fd)
+            while True:
+                columns, rows = shutil.get_terminal_size()
+                height = max(1, rows - 1)
+                self._set_width(columns)
+                self._draw(stream, columns, height, title)
+                for key in split_keys(decoder.decode(os.read(tty_fd, 1024))):
+                    if not self.handle(_KEYS.get(key, ""), height):
+                        return
+        finally:
+            termios.tcsetattr(tty_fd, termios.TCSADRAIN, saved)
+            os.close(tty_fd)
+            stream.write("\x1b[?7h\x1b[?25h\x1b[?1049l")
+            stream.flush()
@@ -1,6 +1,7 @@
 import re
+from collections import deque
 from enum import Enum, auto
-from typing import List, Optional, Tuple, Union, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 
 class ElementType(Enum):
@@ -25,15 +26,28 @@ class ElementType(Enum):
     TABLE = auto()    # New element type for tables
 
 
+# Shared content of elements created without any; immutable so it can never be
+# filled in by accident
+EMPTY_CONTENT = ()
+
+
 class MarkdownElement:
-    def __init__(self, element_type: ElementType, content=None, level=0, url=None):
+    __slots__ = ('type', 'content', 'level', 'url', 'language')
+    
+    def __init__(self, element_type: ElementType, content=None, level=0, url=None, language=None):
         self.type = element_type
-        self.content = content or []
+        if not content:
+            # Empty text stays a string so code spans and blocks can still be rendered
+            content = '' if isinstance(content, str) else EMPTY_CONTENT
+        self.content = content
         self.level = level
         self.url = url
+        self.language = language  # Only set for CODE_BLOCK
 
 
 class TableCell:
+    __slots__ = ('content', 'is_header', 'alignment')
+    
     def __init__(self, content, is_header=False, alignment=None):
         self.content = content
         self.is_header = is_header
@@ -41,203 +55,336 @@ class TableCell:
 
 
 class Table:
+    __slots__ = ('headers', 'rows', 'alignments')
+    
     def __init__(self, headers=None, rows=None, alignments=None):
         self.headers = headers or []
         self.rows = rows or []
         self.alignments = alignments or []  # List of alignment strings for each column
 
 
+_COMMENT_LINE = re.compile(r'^\s*<!--(.*?)-->\s*$')
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?(\s*:?-+:?\s*\|)+\s*:?-+:?\s*\|?\s*$')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?$')
+_RULE = re.compile(r'^(\*{3,}|-{3,}|_{3,})$')
+_CODE_FENCE = re.compile(r'```')
+_BLOCKQUOTE = re.compile(r'>')
+_DASH_ITEM = re.compile(r'^\s*-\s')
+_ASTERISK_ITEM = re.compile(r'^\s*\*\s')
+_PLUS_ITEM = re.compile(r'^\s*\+\s')
+_ORDERED_ITEM = re.compile(r'^\s*\d+\.\s')
+_BULLET_ITEM = re.compile(r'^\s*[-*+]\s')
+_IMAGE_LINE = re.compile(r'^\s*!\[(.*?)\]\((.*?)\)\s*$')
+# A table cell up to its closing pipe; escaped pipes and code spans do not close it
+_TABLE_CELL = re.compile(r'([^\\`|]*(?:(?:\\.?|`[^`]*`|`)[^\\`|]*)*)\|', re.DOTALL)
+_TABLE_ESCAPE = re.compile(r'`[^`]*`|\\(.?)', re.DOTALL)
+
+_LIST_ITEMS = {
+    ElementType.DASH_LIST: _DASH_ITEM,
+    ElementType.ASTERISK_LIST: _ASTERISK_ITEM,
+    ElementType.PLUS_LIST: _PLUS_ITEM,
+    ElementType.ORDERED_LIST: _ORDERED_ITEM,
+}
+
+_RULE_TYPES = {
+    '-': ElementType.DASH_RULE,
+    '*': ElementType.ASTERISK_RULE,
+    '_': ElementType.UNDERSCORE_RULE,
+}
+
+
+class _BlockClassifier:
+    """Decides which block a line opens, trying only the patterns its first non-blank character allows"""
+    
+    def __init__(self):
+        # (element type, pattern, must start in column 0), in the order the
+        # block rules take precedence
+        rule = (None, _RULE, True)
+        self.openers = {
+            '#': [(ElementType.HEADING, _HEADING, True)],
+            '-': [rule, (ElementType.DASH_LIST, _DASH_ITEM, False)],
+            '*': [rule, (ElementType.ASTERISK_LIST, _ASTERISK_ITEM, False)],
+            '_': [rule],
+            '`': [(ElementType.CODE_BLOCK, _CODE_FENCE, True)],
+            '>': [(ElementType.BLOCKQUOTE, _BLOCKQUOTE, True)],
+            '+': [(ElementType.PLUS_LIST, _PLUS_ITEM, False)],
+            '!': [(ElementType.IMAGE, _IMAGE_LINE, False)],
+        }
+        ordered = [(ElementType.ORDERED_LIST, _ORDERED_ITEM, False)]
+        for digit in '0123456789':
+            self.openers[digit] = ordered
+        self._ordered = ordered
+        
+        # Lines that interrupt a running paragraph
+        self.breakers = {
+            '-': [_BULLET_ITEM, _RULE],
+            '*': [_BULLET_ITEM, _RULE],
+            '+': [_BULLET_ITEM],
+            '_': [_RULE],
+            '!': [_IMAGE_LINE],
+        }
+        ordered_breakers = [_ORDERED_ITEM]
+        for digit in '0123456789':
+            self.breakers[digit] = ordered_breakers
+        self._ordered_breakers = ordered_breakers
+    
+    def _candidates(self, table: Dict, first: str, default):
+        candidates = table.get(first)
+        if candidates is None and first.isdecimal():
+            return default
+        return candidates or ()
+    
+    def classify(self, line: str, stripped: str, next_line: Optional[str]):
+        """Return (element type, match) for the block ``line`` opens, or (None, None) for paragraph text.
+
+        Multi-line comments are reported as COMMENT with no match and tables
+        as TABLE with no match.
+        """
+        first = stripped[0]
+        if first == '<':
+            comment_match = _COMMENT_LINE.match(line)
+            if comment_match:
+                return ElementType.COMMENT, comment_match
+        
+        if '<!--' in line and '-->' not in line:
+            return ElementType.COMMENT, None
+        
+        if self.starts_table(line, next_line):
+            return ElementType.TABLE, None
+        
+        for element_type, pattern, anchored in self._candidates(self.openers, first, self._ordered):
+            if anchored and line[0] != first:
+                continue
+            match = pattern.match(line)
+            if match:
+                return element_type or _RULE_TYPES[first], match
+        
+        return None, None
+    
+    def starts_table(self, line: str, next_line: Optional[str]) -> bool:
+        return (next_line is not None and '|' in line and '|' in next_line
+                and _TABLE_SEPARATOR.match(next_line) is not None)
+    
+    def ends_paragraph(self, line: str, next_line: Optional[str]) -> bool:
+        stripped = line.lstrip()
+        if not stripped:
+            return True
+        
+        first = line[0]
+        if first == '#' or first == '>':
+            return True
+        if (first == '`' and line.startswith('```')) or (first == '<' and line.startswith('<!--')):
+            return True
+        
+        if self.starts_table(line, next_line):
+            return True
+        
+        for pattern in self._candidates(self.breakers, stripped[0], self._ordered_breakers):
+            if pattern is _RULE and first != stripped[0]:
+                continue
+            if pattern.match(line):
+                return True
+        
+        return False
+
+
+class _LineReader:
+    """Forward-only cursor over lines with a small lookahead buffer"""
+    
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._buffer = deque()
+        self.position = 0  # Number of lines consumed so far
+    
+    def peek(self, offset: int = 0) -> Optional[str]:
+        """Return the line ``offset`` positions ahead without consuming it, or None past the end"""
+        buffer = self._buffer
+        while len(buffer) <= offset:
+            line = next(self._lines, None)
+            if line is None:
+                return None
+            buffer.append(line)
+        return buffer[offset]
+    
+    def advance(self) -> str:
+        """Consume and return the current line"""
+        if not self._buffer:
+            self.peek()
+        self.position += 1
+        return self._buffer.popleft()
+
+
+def _unescape_table_cell(match) -> str:
+    text = match.group()
+    if text[0] == '`':
+        return text.replace('\\|', '|')
+    return match.group(1)
+
+
+def _skip_inline(text: str) -> List[Union[str, MarkdownElement]]:
+    return []
+
+
+def _read_lines(fileobj: Iterable[str]) -> Iterator[str]:
+    """Yield the lines of ``fileobj`` the way ``text.split('\\n')`` would, one at a time"""
+    line = ''
+    for line in fileobj:
+        yield line[:-1] if line.endswith('\n') else line
+    if line == '' or line.endswith('\n'):
+        yield ''
+
+
 class MarkdownParser:
     def __init__(self):
         self.elements = []
+        self._classifier = _BlockClassifier()
     
     def parse(self, text: str) -> List[MarkdownElement]:
-        self.elements = []
+        self.elements = list(self._iter_blocks(_LineReader(text.split('\n'))))
+        return self.elements
+    
+    def iter_parse(self, fileobj: Iterable[str]) -> Iterator[MarkdownElement]:
+        """Parse a file object (or any iterable of lines) lazily.
+
+        Each block element is yielded as soon as it is closed, so only the
+        lines of the current block are held in memory. ``self.elements`` is
+        left untouched.
+        """
+        return self._iter_blocks(_LineReader(_read_lines(fileobj)))
+    
+    def split_blocks(self, text: str) -> List[str]:
+        """Split ``text`` into the source of each block without parsing inline content.
+
+        Parsing one of the returned strings on its own yields exactly that block.
+        """
         lines = text.split('\n')
+        reader = _LineReader(lines)
+        blocks = []
+        end = 0
+        for _ in self._iter_blocks(reader, _skip_inline):
+            start = end
+            end = reader.position
+            while not lines[start].strip():
+                start += 1
+            blocks.append('\n'.join(lines[start:end]))
+        return blocks
+    
+    def _iter_blocks(self, reader: _LineReader, parse_inline=None) -> Iterator[MarkdownElement]:
+        classifier = self._classifier
+        parse_inline = parse_inline or self._parse_inline
         
-        i = 0
-        while i < len(lines):
-            line = lines[i]
+        while True:
+            line = reader.peek()
+            if line is None:
+                return
+            stripped = line.lstrip()
             
             # Handle empty lines
-            if not line.strip():
-                i += 1
+            if not stripped:
+                reader.advance()
                 continue
             
-            # Handle HTML comments
-            comment_match = re.match(r'^\s*<!--(.*?)-->\s*$', line)
-            if comment_match:
-                content = comment_match.group(1).strip()
-                self.elements.append(MarkdownElement(ElementType.COMMENT, content))
-                i += 1
-                continue
+            block_type, match = classifier.classify(line, stripped, reader.peek(1))
             
-            # Handle multi-line HTML comments
-            if '<!--' in line and '-->' not in line:
+            # Handle HTML comments
+            if block_type == ElementType.COMMENT:
+                reader.advance()
+                if match:
+                    content = match.group(1).strip()
+                    yield MarkdownElement(ElementType.COMMENT, content)
+                    continue
+                
+                # Multi-line HTML comment
                 comment_lines = [line[line.find('<!--')+4:]]
-                i += 1
-                while i < len(lines) and '-->' not in lines[i]:
-                    comment_lines.append(lines[i])
-                    i += 1
-                if i < len(lines):
-                    comment_lines.append(lines[i][:lines[i].find('-->')])
-                    i += 1
+                while reader.peek() is not None and '-->' not in reader.peek():
+                    comment_lines.append(reader.advance())
+                if reader.peek() is not None:
+                    closing_line = reader.advance()
+                    comment_lines.append(closing_line[:closing_line.find('-->')])
                 content = '\n'.join(comment_lines).strip()
-                self.elements.append(MarkdownElement(ElementType.COMMENT, content))
+                yield MarkdownElement(ElementType.COMMENT, content)
                 continue
             
-            # Handle tables - check for table header and separator
-            if i + 1 < len(lines) and '|' in line and '|' in lines[i+1] and re.match(r'^\s*\|?(\s*:?-+:?\s*\|)+\s*:?-+:?\s*\|?\s*$', lines[i+1]):
-                table_result = self._parse_table(lines, i)
-                if table_result:
-                    table_element, next_line = table_result
-                    self.elements.append(table_element)
-                    i = next_line
-                    continue
+            # Handle tables
+            if block_type == ElementType.TABLE:
+                yield self._parse_table(reader, parse_inline)
+                continue
+            
+            reader.advance()
             
             # Handle headings
-            heading_match = re.match(r'^(#{1,6})\s+(.*?)(?:\s+#+)?$', line)
-            if heading_match:
-                level = len(heading_match.group(1))
-                content = self._parse_inline(heading_match.group(2).strip())
-                self.elements.append(MarkdownElement(ElementType.HEADING, content, level))
-                i += 1
+            if block_type == ElementType.HEADING:
+                level = len(match.group(1))
+                content = parse_inline(match.group(2).strip())
+                yield MarkdownElement(ElementType.HEADING, content, level)
                 continue
             
             # Handle horizontal rules
-            hr_match = re.match(r'^(\*{3,}|-{3,}|_{3,})$', line)
-            if hr_match:
-                marker = hr_match.group(1)[0]
-                if marker == '-':
-                    self.elements.append(MarkdownElement(ElementType.DASH_RULE))
-                elif marker == '*':
-                    self.elements.append(MarkdownElement(ElementType.ASTERISK_RULE))
-                elif marker == '_':
-                    self.elements.append(MarkdownElement(ElementType.UNDERSCORE_RULE))
-                i += 1
+            if block_type in (ElementType.DASH_RULE, ElementType.ASTERISK_RULE, ElementType.UNDERSCORE_RULE):
+                yield MarkdownElement(block_type)
                 continue
             
             # Handle code blocks
-            if line.startswith('```'):
+            if block_type == ElementType.CODE_BLOCK:
                 code_block = []
                 language = line[3:].strip()
-                i += 1
-                while i < len(lines) and not lines[i].startswith('```'):
-                    code_block.append(lines[i])
-                    i += 1
-                if i < len(lines):  # Skip the closing ```
-                    i += 1
-                element = MarkdownElement(ElementType.CODE_BLOCK, '\n'.join(code_block))
-                element.language = language if language else None
-                self.elements.append(element)
+                while reader.peek() is not None and not reader.peek().startswith('```'):
+                    code_block.append(reader.advance())
+                if reader.peek() is not None:  # Skip the closing ```
+                    reader.advance()
+                yield MarkdownElement(ElementType.CODE_BLOCK, '\n'.join(code_block), language=language or None)
                 continue
             
             # Handle blockquotes
-            if line.startswith('>'):
-                quote_lines = []
-                while i < len(lines) and lines[i].startswith('>'):
-                    quote_lines.append(lines[i][1:].strip())
-                    i += 1
-                content = self._parse_inline(' '.join(quote_lines))
-                self.elements.append(MarkdownElement(ElementType.BLOCKQUOTE, content))
-                continue
-            
-            # Handle dash lists
-            if re.match(r'^\s*-\s', line):
-                list_items = []
-                while i < len(lines) and re.match(r'^\s*-\s', lines[i]):
-                    item_content = re.sub(r'^\s*-\s', '', lines[i])
-                    list_items.append(self._parse_inline(item_content))
-                    i += 1
-                self.elements.append(MarkdownElement(ElementType.DASH_LIST, list_items))
-                continue
-            
-            # Handle asterisk lists
-            if re.match(r'^\s*\*\s', line):
-                list_items = []
-                while i < len(lines) and re.match(r'^\s*\*\s', lines[i]):
-                    item_content = re.sub(r'^\s*\*\s', '', lines[i])
-                    list_items.append(self._parse_inline(item_content))
-                    i += 1
-                self.elements.append(MarkdownElement(ElementType.ASTERISK_LIST, list_items))
+            if block_type == ElementType.BLOCKQUOTE:
+                quote_lines = [line[1:].strip()]
+                while reader.peek() is not None and reader.peek().startswith('>'):
+                    quote_lines.append(reader.advance()[1:].strip())
+                content = parse_inline(' '.join(quote_lines))
+                yield MarkdownElement(ElementType.BLOCKQUOTE, content)
                 continue
             
-            # Handle plus lists
-            if re.match(r'^\s*\+\s', line):
-                list_items = []
-                while i < len(lines) and re.match(r'^\s*\+\s', lines[i]):
-                    item_content = re.sub(r'^\s*\+\s', '', lines[i])
-                    list_items.append(self._parse_inline(item_content))
-                    i += 1
-                self.elements.append(MarkdownElement(ElementType.PLUS_LIST, list_items))
-                continue
-            
-            # Handle ordered lists
-            if re.match(r'^\s*\d+\.\s', line):
-                list_items = []
-                while i < len(lines) and re.match(r'^\s*\d+\.\s', lines[i]):
-                    item_content = re.sub(r'^\s*\d+\.\s', '', lines[i])
-                    list_items.append(self._parse_inline(item_content))
-                    i += 1
-                self.elements.append(MarkdownElement(ElementType.ORDERED_LIST, list_items))
+            # Handle dash, asterisk, plus and ordered lists
+            if block_type in _LIST_ITEMS:
+                item_pattern = _LIST_ITEMS[block_type]
+                list_items = [parse_inline(line[match.end():])]
+                while reader.peek() is not None:
+                    item_match = item_pattern.match(reader.peek())
+                    if not item_match:
+                        break
+                    list_items.append(parse_inline(reader.advance()[item_match.end():]))
+                yield MarkdownElement(block_type, list_items)
                 continue
             
             # Handle images that are on their own line
-            image_match = re.match(r'^\s*!\[(.*?)\]\((.*?)\)\s*$', line)
-            if image_match:
-                alt_text = image_match.group(1)
-                image_url = image_match.group(2)
-                element = MarkdownElement(ElementType.IMAGE, self._parse_inline(alt_text), url=image_url)
-                self.elements.append(element)
-                i += 1
+            if block_type == ElementType.IMAGE:
+                alt_text = match.group(1)
+                image_url = match.group(2)
+                yield MarkdownElement(ElementType.IMAGE, parse_inline(alt_text), url=image_url)
                 continue
             
             # Handle paragraphs
-            paragraph_lines = []
-            while i < len(lines) and lines[i].strip() and not (
-                    lines[i].startswith('#') or
-                    lines[i].startswith('```') or
-                    lines[i].startswith('>') or
-                    lines[i].startswith('<!--') or
-                    ('|' in lines[i] and i + 1 < len(lines) and
-                     '|' in lines[i+1] and re.match(r'^\s*\|?(\s*:?-+:?\s*\|)+\s*:?-+:?\s*\|?\s*$', lines[i+1])) or
-                    re.match(r'^\s*[-*+]\s', lines[i]) or
-                    re.match(r'^\s*\d+\.\s', lines[i]) or
-                    re.match(r'^(\*{3,}|-{3,}|_{3,})$', lines[i]) or
-                    re.match(r'^\s*!\[(.*?)\]\((.*?)\)\s*$', lines[i])
-            ):
-                paragraph_lines.append(lines[i])
-                i += 1
-            
-            if paragraph_lines:
-                content = self._parse_inline(' '.join(paragraph_lines))
-                self.elements.append(MarkdownElement(ElementType.PARAGRAPH, content))
+            if classifier.ends_paragraph(line, reader.peek()):
+                # If we get here, we couldn't parse the line, so treat as plain text
+                yield MarkdownElement(ElementType.TEXT, [line])
                 continue
             
-            # If we get here, we couldn't parse the line, so treat as plain text
-            self.elements.append(MarkdownElement(ElementType.TEXT, [line]))
-            i += 1
-        
-        return self.elements
+            paragraph_lines = [line]
+            while reader.peek() is not None and not classifier.ends_paragraph(reader.peek(), reader.peek(1)):
+                paragraph_lines.append(reader.advance())
+            
+            content = parse_inline(' '.join(paragraph_lines))
+            yield MarkdownElement(ElementType.PARAGRAPH, content)
     
-    def _parse_table(self, lines: List[str], start_index: int) -> Optional[Tuple[MarkdownElement, int]]:
-        """Parse a markdown table and return the table element and the next line index"""
-        if start_index + 1 >= len(lines):
-            return None
-        
+    def _parse_table(self, reader: _LineReader, parse_inline) -> MarkdownElement:
+        """Parse a markdown table starting at the reader's current line, consuming its rows"""
         # Parse header row
-        header_line = lines[start_index]
+        header_line = reader.advance()
         # Parse separator row (determines column alignment)
-        separator_line = lines[start_index + 1]
-        
-        # Check if valid separator line
-        if not re.match(r'^\s*\|?(\s*:?-+:?\s*\|)+\s*:?-+:?\s*\|?\s*$', separator_line):
-            return None
+        separator_line = reader.advance()
         
         # Process header cells
         header_cells = self._split_table_row(header_line)
-        if not header_cells:
-            return None
         
         # Process separator cells to determine alignment
         separator_cells = self._split_table_row(separator_line)
@@ -257,114 +404,174 @@ class MarkdownParser:
         headers = []
         for i, cell in enumerate(header_cells):
             alignment = alignments[i] if i < len(alignments) else 'left'
-            cell_content = self._parse_inline(cell.strip())
+            cell_content = parse_inline(cell.strip())
             headers.append(TableCell(cell_content, is_header=True, alignment=alignment))
         
         # Process data rows
         rows = []
-        current_index = start_index + 2
-        while current_index < len(lines) and '|' in lines[current_index]:
-            row_cells = self._split_table_row(lines[current_index])
-            if not row_cells:
-                break
+        while reader.peek() is not None and '|' in reader.peek():
+            row_cells = self._split_table_row(reader.advance())
             
             row = []
             for i, cell in enumerate(row_cells):
                 alignment = alignments[i] if i < len(alignments) else 'left'
-                cell_content = self._parse_inline(cell.strip())
+                cell_content = parse_inline(cell.strip())
                 row.append(TableCell(cell_content, is_header=False, alignment=alignment))
             
             rows.append(row)
-            current_index += 1
         
         # Create table content
         table = Table(headers=headers, rows=rows, alignments=alignments)
-        element = MarkdownElement(ElementType.TABLE, table)
-        
-        return element, current_index
+        return MarkdownElement(ElementType.TABLE, table)
     
     def _split_table_row(self, row: str) -> List[str]:
-        """Split a table row into individual cells"""
+        """Split a table row into individual cells.
+        
+        A backslash escapes the next character and is dropped. Pipes inside a
+        code span do not split the row; backslashes there are kept, except
+        before a pipe.
+        """
         # Remove leading and trailing pipe if present
-        if row.strip().startswith('|'):
-            row = row.strip()[1:]
-        if row.strip().endswith('|'):
-            row = row.strip()[:-1]
+        row = row.strip()
+        if row.startswith('|'):
+            row = row[1:]
+        if row.endswith('|'):
+            row = row[:-1]
         
-        # Split by pipe, but respect escaped pipes
-        cells = []
-        current_cell = ""
-        escape_active = False
-        for char in row:
-            if char == '\\' and not escape_active:
-                escape_active = True
-                continue
-            
-            if char == '|' and not escape_active:
-                cells.append(current_cell)
-                current_cell = ""
-            else:
-                current_cell += char
-                escape_active = False
+        if '\\' not in row and '`' not in row:
+            return row.split('|')
         
-        cells.append(current_cell)
+        cells = _TABLE_CELL.findall(row + '|')
+        for i, cell in enumerate(cells):
+            if '\\' in cell:
+                cells[i] = _TABLE_ESCAPE.sub(_unescape_table_cell, cell)
         return cells
     
     def _parse_inline(self, text: str) -> List[Union[str, MarkdownElement]]:
         if not text:
             return []
         
+        return _InlineTokenizer(text).parse(0, len(text))
+
+
+class _InlineTokenizer:
+    """Single forward walk over inline text.
+
+    Produces the same tree as matching the comment, image, bold, italic, code
+    and link patterns against the remaining text and taking the earliest match,
+    but never rescans: candidate openers are found with one compiled search and
+    closing delimiters are looked up through a per-token cache of the next
+    occurrence, which stays valid because lookups only move forward.
+    Nested bodies are tokenized as sub-ranges of the same string.
+    """
+    
+    _OPENER = re.compile(r'<!--|!\[|[*_`\[]')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self._next = {}
+    
+    def _find(self, token: str, start: int, end: int) -> int:
+        """Index of the first ``token`` at or after ``start`` that ends by ``end`` and on the same line, else -1"""
+        cached = self._next.get(token)
+        if cached is not None and cached[0] <= start and (cached[1] >= start or cached[1] == -1):
+            pos = cached[1]
+        else:
+            pos = self.text.find(token, start)
+            self._next[token] = (start, pos)
+        if pos == -1 or pos + len(token) > end:
+            return -1
+        if token != '\n':
+            newline = self._find('\n', start, end)
+            if newline != -1 and newline < pos + len(token):
+                return -1
+        return pos
+    
+    def _match(self, pos: int, end: int):
+        """Try every construct that can open at ``pos``; return (element, match_end) or None"""
+        text = self.text
+        char = text[pos]
+        
+        if char == '<':
+            close = self._find('-->', pos + 4, end)
+            if close != -1:
+                content = text[pos + 4:close].strip()
+                return MarkdownElement(ElementType.COMMENT, content), close + 3
+            return None
+        
+        if char == '!':
+            target = self._match_target(pos + 2, end)
+            if target:
+                label_end, url_start, url_end = target
+                alt_text = self.parse(pos + 2, label_end)
+                url = text[url_start:url_end]
+                return MarkdownElement(ElementType.IMAGE, alt_text, url=url), url_end + 1
+            return None
+        
+        if char == '[':
+            target = self._match_target(pos + 1, end)
+            if target:
+                label_end, url_start, url_end = target
+                text_content = self.parse(pos + 1, label_end)
+                url = text[url_start:url_end]
+                return MarkdownElement(ElementType.LINK, text_content, url=url), url_end + 1
+            return None
+        
+        if char == '`':
+            close = self._find('`', pos + 1, end)
+            if close != -1:
+                return MarkdownElement(ElementType.CODE, text[pos + 1:close]), close + 1
+            return None
+        
+        # '*' or '_': bold takes a doubled delimiter, italic a single one
+        # whose body does not start with the delimiter again
+        if pos + 1 < end and text[pos + 1] == char:
+            delimiter = char * 2
+            close = self._find(delimiter, pos + 2, end)
+            if close != -1:
+                content = self.parse(pos + 2, close)
+                return MarkdownElement(ElementType.BOLD, content), close + 2
+            return None
+        
+        close = self._find(char, pos + 1, end)
+        if close != -1:
+            content = self.parse(pos + 1, close)
+            return MarkdownElement(ElementType.ITALIC, content), close + 1
+        return None
+    
+    def _match_target(self, label_start: int, end: int) -> Optional[Tuple[int, int, int]]:
+        """Locate the ``](url)`` tail of a link or image whose label starts at ``label_start``"""
+        label_end = self._find('](', label_start, end)
+        if label_end == -1:
+            return None
+        url_end = self._find(')', label_end + 2, end)
+        if url_end == -1:
+            return None
+        return label_end, label_end + 2, url_end
+    
+    def parse(self, start: int, end: int) -> List[Union[str, MarkdownElement]]:
+        text = self.text
+        opener = self._OPENER
         result = []
-        remaining_text = text
+        segment_start = start
+        pos = start
         
-        while remaining_text:
-            # Check for inline HTML comments
-            comment_match = re.search(r'<!--(.*?)-->', remaining_text)
-            # Image
-            image_match = re.search(r'!\[(.*?)\]\((.*?)\)', remaining_text)
-            # Bold
-            bold_match = re.search(r'(\*\*|__)(.*?)\1', remaining_text)
-            # Italic
-            italic_match = re.search(r'(\*|_)((?!\1).*?)\1', remaining_text)
-            # Code
-            code_match = re.search(r'`(.*?)`', remaining_text)
-            # Link
-            link_match = re.search(r'\[(.*?)\]\((.*?)\)', remaining_text)
-            
-            matches = [m for m in [comment_match, image_match, bold_match, italic_match, code_match, link_match] if m]
-            
-            if not matches:
-                result.append(remaining_text)
+        while pos < end:
+            found = opener.search(text, pos, end)
+            if not found:
                 break
-            
-            earliest_match = min(matches, key=lambda m: m.start())
-            
-            # Add text before the match
-            if earliest_match.start() > 0:
-                result.append(remaining_text[:earliest_match.start()])
-            
-            # Process the match
-            if earliest_match == comment_match:
-                content = earliest_match.group(1).strip()
-                result.append(MarkdownElement(ElementType.COMMENT, content))
-            elif earliest_match == image_match:
-                alt_text = self._parse_inline(earliest_match.group(1))
-                url = earliest_match.group(2)
-                result.append(MarkdownElement(ElementType.IMAGE, alt_text, url=url))
-            elif earliest_match == bold_match:
-                content = self._parse_inline(earliest_match.group(2))
-                result.append(MarkdownElement(ElementType.BOLD, content))
-            elif earliest_match == italic_match:
-                content = self._parse_inline(earliest_match.group(2))
-                result.append(MarkdownElement(ElementType.ITALIC, content))
-            elif earliest_match == code_match:
-                result.append(MarkdownElement(ElementType.CODE, earliest_match.group(1)))
-            elif earliest_match == link_match:
-                text_content = self._parse_inline(earliest_match.group(1))
-                url = earliest_match.group(2)
-                result.append(MarkdownElement(ElementType.LINK, text_content, url=url))
-            
-            # Continue with the remaining text
-            remaining_text = remaining_text[earliest_match.end():]
+            pos = found.start()
+            matched = self._match(pos, end)
+            if matched is None:
+                pos += 1
+                continue
+            element, match_end = matched
+            if pos > segment_start:
+                result.append(text[segment_start:pos])
+            result.append(element)
+            segment_start = pos = match_end
+        
+        if segment_start < end:
+            result.append(text[segment_start:end])
         
         return result
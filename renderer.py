@@ -1,34 +1,57 @@
 from parser import ElementType, MarkdownElement, MarkdownParser, Table, TableCell
-from typing import List, Union, Optional
-import re
+from doctree import FlatTree
+from layout import fill, text_width, visible_width, wrap
+from typing import IO, AsyncIterator, Iterable, Iterator, List, Union, Optional
+import hashlib
 import shutil
-import textwrap
-import pygments
-from pygments.lexers import get_lexer_by_name
-from pygments.formatters import Terminal256Formatter
-from pygments.util import ClassNotFound
+import sys
+import threading
+import time
 import random
 import os
-import subprocess
-import base64
-from io import BytesIO
-
-try:
-    from term_image.image import from_file, from_url, AutoImage
-    from term_image.image import Size as ImageSize
-    from term_image.image import Size
-    TERM_IMAGE_AVAILABLE = True
-except ImportError:
-    TERM_IMAGE_AVAILABLE = False
+from collections import OrderedDict, deque
+from io import StringIO
+from itertools import islice
+
+# Pygments and term-image are imported on first use so that rendering
+# documents without code blocks or images does not pay for them at startup
+_term_image = None
+
+
+def _load_term_image():
+    """Import term-image on first use; returns its image module, or None when it is not installed"""
+    global _term_image
+    if _term_image is None:
+        try:
+            from term_image import image
+        except ImportError:
+            image = False
+        _term_image = image
+    return _term_image or None
+
+_themes = {}
+_themes_lock = threading.Lock()
+# Most themes ``ColorConfig.shared`` keeps; the oldest is dropped first, renderers holding it keep their reference
+_MAX_THEMES = 64
+
 
 class ColorConfig:
-    def __init__(self, colored_output=True):
+    """Escape sequences for every styled element.
+    
+    Instances are frozen once built; ``ColorConfig.shared`` hands out one
+    instance per (colored_output, seed) for the whole process. Heading
+    colors are random, drawn from ``random.Random(seed)`` when a seed is
+    given and from the global ``random`` module otherwise.
+    """
+    
+    def __init__(self, colored_output=True, seed: Optional[int] = None):
         if colored_output:
             # Generate random colors for headings
-            h1_color = (random.randint(160, 255), random.randint(160, 255), random.randint(160, 255))
-            h2_color = (random.randint(160, 255), random.randint(160, 255), random.randint(160, 255))
-            h3_color = (random.randint(160, 255), random.randint(160, 255), random.randint(160, 255))
-            h4_color = (random.randint(160, 255), random.randint(160, 255), random.randint(160, 255))
+            rnd = random.Random(seed) if seed is not None else random
+            h1_color = (rnd.randint(160, 255), rnd.randint(160, 255), rnd.randint(160, 255))
+            h2_color = (rnd.randint(160, 255), rnd.randint(160, 255), rnd.randint(160, 255))
+            h3_color = (rnd.randint(160, 255), rnd.randint(160, 255), rnd.randint(160, 255))
+            h4_color = (rnd.randint(160, 255), rnd.randint(160, 255), rnd.randint(160, 255))
             
             # Convert RGB to ANSI escape sequences
             self.H1_COLOR = f"\033[38;2;{h1_color[0]};{h1_color[1]};{h1_color[2]}m"
@@ -99,15 +122,382 @@ class ColorConfig:
             self.COMMENT_TEXT = ""
             self.TABLE_BORDER = self.TABLE_HEADER_BG = self.TABLE_HEADER_TEXT = ""
             self.TABLE_ROW_ODD = self.TABLE_ROW_EVEN = self.TABLE_TEXT = ""
+        
+        for name, value in vars(self).items():
+            object.__setattr__(self, name, sys.intern(value))
+        object.__setattr__(self, "_frozen", True)
+    
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{type(self).__name__} is immutable; build a new one instead")
+        object.__setattr__(self, name, value)
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    @classmethod
+    def shared(cls, colored_output=True, seed: Optional[int] = None) -> "ColorConfig":
+        """The process-wide theme for ``colored_output`` and ``seed``, built on first use"""
+        key = (bool(colored_output), seed if colored_output else None)
+        theme = _themes.get(key)
+        if theme is None:
+            with _themes_lock:
+                theme = _themes.get(key)
+                if theme is None:
+                    if len(_themes) >= _MAX_THEMES:
+                        del _themes[next(iter(_themes))]
+                    theme = _themes[key] = cls(colored_output, seed)
+        return theme
+
+
+def _atomic_write(path: str, text: str) -> bool:
+    """Write ``text`` to ``path`` through a private temp file and a rename, so readers never see a partial file"""
+    import tempfile
+    
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _default_cache_dir(name: str) -> str:
+    """The XDG cache location for the on-disk cache ``name``"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "sombrero", name)
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], key[2:])
+
+
+def _read_entry(path: str) -> Optional[str]:
+    """The text of the cache entry at ``path``, marked as just used; None when there is none"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return None
+    try:
+        # The modification time doubles as the last use for eviction
+        os.utime(path)
+    except OSError:
+        pass
+    return text
+
+
+def _evict_lru(cache_dir: str, max_bytes: int) -> int:
+    """Delete the least recently used entry files below ``cache_dir`` until it holds ``max_bytes`` or less.
+    
+    Entries live one directory level down and their modification time is
+    their last use. Returns the number of files deleted.
+    """
+    entries = []
+    total = 0
+    try:
+        for bucket in os.scandir(cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    except OSError:
+        return 0
+    
+    evicted = 0
+    if total <= max_bytes:
+        return evicted
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.unlink(path)
+        except OSError:
+            # Another process evicted it first
+            pass
+        else:
+            evicted += 1
+        total -= size
+        if total <= max_bytes:
+            break
+    return evicted
+
+
+_pygments_version = None
+
+
+def _get_pygments_version() -> str:
+    """The installed Pygments version, part of every highlight and document cache key"""
+    global _pygments_version
+    if _pygments_version is None:
+        try:
+            import pygments
+            
+            _pygments_version = pygments.__version__
+        except ImportError:
+            _pygments_version = ""
+    return _pygments_version
+
+
+class HighlightCache:
+    """Cache of Pygments output keyed by (language, style, Pygments version, content hash).
+    
+    Entries live in a bounded in-memory LRU. When ``cache_dir`` is given they
+    are also stored there, one file per entry, so separate processes can
+    reuse each other's highlighting; the directory is trimmed to
+    ``max_bytes``, least recently used first.
+    """
+    # Disk writes between checks of the directory size
+    EVICT_INTERVAL = 64
+    
+    def __init__(self, max_entries: int = 512, cache_dir: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def default_dir() -> str:
+        """The XDG cache location for highlighted code"""
+        return _default_cache_dir("highlight")
+    
+    @staticmethod
+    def _key(language: str, style: str, content: str) -> str:
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=20)
+        digest.update(f"\0{language}\0{style}\0{_get_pygments_version()}".encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, language: str, style: str, content: str) -> Optional[str]:
+        key = self._key(language, style, content)
+        
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        
+        if self.cache_dir:
+            highlighted = _read_entry(_entry_path(self.cache_dir, key))
+            if highlighted is not None:
+                self.disk_hits += 1
+                self._remember(key, highlighted)
+                return highlighted
+        
+        self.misses += 1
+        return None
+    
+    def put(self, language: str, style: str, content: str, highlighted: str) -> None:
+        key = self._key(language, style, content)
+        self._remember(key, highlighted)
+        
+        if self.cache_dir and _atomic_write(_entry_path(self.cache_dir, key), highlighted):
+            self._writes += 1
+            if (self._writes - 1) % self.EVICT_INTERVAL == 0:
+                self.evictions += _evict_lru(self.cache_dir, self.max_bytes)
+    
+    def _remember(self, key: str, highlighted: str) -> None:
+        self._entries[key] = highlighted
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+        }
+
+
+# Part of every document cache key; bump whenever rendered output changes
+RENDER_VERSION = 1
+
+
+class DocumentCache:
+    """On-disk cache of fully rendered documents, one file per entry.
+    
+    Entries are keyed by a hash of the source and everything else the output
+    depends on, written atomically, and evicted least recently used first
+    once the directory grows past ``max_bytes``.
+    """
+    # Disk writes between checks of the directory size
+    EVICT_INTERVAL = 16
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir or self.default_dir()
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def default_dir() -> str:
+        """The XDG cache location for rendered documents"""
+        return _default_cache_dir("documents")
+    
+    @staticmethod
+    def key(source: str, width: int, theme_seed: Optional[int], colored_output: bool, code_style: str) -> str:
+        digest = hashlib.blake2b(source.encode("utf-8"), digest_size=20)
+        digest.update(f"\0{width}\0{theme_seed}\0{bool(colored_output)}\0{code_style}\0{_get_pygments_version()}"
+                      f"\0{RENDER_VERSION}".encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        rendered = _read_entry(_entry_path(self.cache_dir, key))
+        if rendered is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rendered
+    
+    def put(self, key: str, rendered: str) -> None:
+        if _atomic_write(_entry_path(self.cache_dir, key), rendered):
+            self._writes += 1
+            if (self._writes - 1) % self.EVICT_INTERVAL == 0:
+                self.evictions += _evict_lru(self.cache_dir, self.max_bytes)
+    
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class LexerPool:
+    """Reusable Pygments lexers and formatters.
+    
+    Language names are normalized through an alias table built once from
+    Pygments' builtin lexer metadata, so every alias of a language shares one
+    lexer instance and lookups never fall through to plugin scanning for
+    known names. Names with no lexer are remembered as negative entries.
+    """
+    
+    # Names used in BoxDrawing.language_icons that Pygments does not know
+    EXTRA_ALIASES = {"yml": "yaml"}
+    
+    _alias_table = None
+    
+    def __init__(self):
+        self._lexers = {}
+        self._formatters = {}
+    
+    @classmethod
+    def _aliases(cls) -> dict:
+        if cls._alias_table is None:
+            table = {}
+            from pygments.lexers import get_all_lexers
+            
+            for name, aliases, _, _ in get_all_lexers(plugins=False):
+                for alias in aliases:
+                    table.setdefault(alias.lower(), name)
+            for alias, target in cls.EXTRA_ALIASES.items():
+                if target in table:
+                    table.setdefault(alias, table[target])
+            cls._alias_table = table
+        return cls._alias_table
+    
+    def lexer(self, language: str):
+        """Return a shared lexer for ``language``, or None if Pygments has none"""
+        from pygments.lexers import find_lexer_class, get_lexer_by_name
+        from pygments.util import ClassNotFound
+        
+        alias = language.lower()
+        name = self._aliases().get(alias)
+        key = name or alias
+        if key in self._lexers:
+            return self._lexers[key]
+        
+        try:
+            if name:
+                lexer = find_lexer_class(name)(stripall=True)
+            else:
+                # Not a builtin alias, so let Pygments search its plugins once
+                lexer = get_lexer_by_name(alias, stripall=True)
+        except ClassNotFound:
+            lexer = None
+        
+        self._lexers[key] = lexer
+        return lexer
+    
+    def formatter(self, style: str):
+        formatter = self._formatters.get(style)
+        if formatter is None:
+            from pygments.formatters import Terminal256Formatter
+            
+            formatter = self._formatters[style] = Terminal256Formatter(style=style)
+        return formatter
+
+
+def _pygments_highlight(lexer_pool: LexerPool, content: str, language: str, style: str) -> Optional[str]:
+    """Highlight ``content`` with a pooled lexer; None when the language is unknown or Pygments is missing"""
+    try:
+        lexer = lexer_pool.lexer(language)
+        if lexer is None:
+            return None
+        import pygments
+        
+        highlighted = pygments.highlight(content, lexer, lexer_pool.formatter(style))
+    except ImportError:
+        return None
+    
+    if highlighted.endswith('\n'):
+        highlighted = highlighted[:-1]
+    return highlighted
+
+
+_worker_lexer_pool = None
+
+
+def _highlight_in_worker(content: str, language: str, style: str) -> Optional[str]:
+    """Process pool entry point; each worker process keeps its own warm LexerPool"""
+    global _worker_lexer_pool
+    if _worker_lexer_pool is None:
+        _worker_lexer_pool = LexerPool()
+    return _pygments_highlight(_worker_lexer_pool, content, language, style)
+
 
 class BoxDrawing:
-    def __init__(self, colors: ColorConfig):
+    # Data rows laid out per piece yielded by iter_table_box
+    TABLE_CHUNK_ROWS = 1024
+    # Distinct single-text cells remembered per table
+    CELL_CACHE_SIZE = 4096
+    
+    def __init__(self, colors: ColorConfig, highlight_cache: Optional[HighlightCache] = None,
+                 lexer_pool: Optional[LexerPool] = None):
         self.colors = colors
+        self.code_style = "monokai"
+        self.highlight_cache = highlight_cache if highlight_cache is not None else HighlightCache()
+        self.lexer_pool = lexer_pool if lexer_pool is not None else LexerPool()
+        self.tables_rendered = 0
+        self.table_rows = 0
+        self.table_seconds = 0.0
+        self.cell_cache_hits = 0
         try:
             self.terminal_width = shutil.get_terminal_size()[0]
         except (AttributeError, ValueError, OSError):
             self.terminal_width = 80
-            
+        
         self.language_icons = {
             "python": "\ue73c",
             "javascript": "\ue781",
@@ -154,8 +544,9 @@ class BoxDrawing:
     
     def fancy_box(self, text: str) -> str:
         max_width = self.terminal_width - 10
-        wrapped_lines = textwrap.wrap(text, width=max_width)
-        content_width = max(len(line) for line in wrapped_lines)
+        wrapped_lines = wrap(text, width=max_width)
+        line_widths = [visible_width(line) for line in wrapped_lines]
+        content_width = max(line_widths)
         box_width = content_width + 4
         center_offset = max(0, (self.terminal_width - box_width) // 2)
         padding_str = " " * center_offset
@@ -164,9 +555,9 @@ class BoxDrawing:
         result = []
         result.append(f"{padding_str}{c.HEADING1_BOX}┏{'━' * box_width}┓{c.RESET}")
         
-        for line in wrapped_lines:
-            padding_left = (box_width - len(line)) // 2
-            padding_right = box_width - len(line) - padding_left
+        for line, line_width in zip(wrapped_lines, line_widths):
+            padding_left = (box_width - line_width) // 2
+            padding_right = box_width - line_width - padding_left
             result.append(f"{padding_str}{c.HEADING1_BOX}┃{' ' * padding_left}{c.HEADING1_CONTENT}{line}{c.HEADING1_BOX}{' ' * padding_right}┃{c.RESET}")
         
         result.append(f"{padding_str}{c.HEADING1_BOX}┗{'━' * box_width}┛{c.RESET}")
@@ -175,16 +566,17 @@ class BoxDrawing:
     
     def h2_decoration(self, text: str) -> str:
         c = self.colors
-        line = "═" * (len(text) + 4)
-        center_offset = max(0, (self.terminal_width - len(text)) // 2)
+        heading_width = visible_width(text)
+        line = "═" * (heading_width + 4)
+        center_offset = max(0, (self.terminal_width - heading_width) // 2)
         padding_str = " " * center_offset
         underline_padding = " " * max(0, center_offset - 2)
         return f"{padding_str}{c.HEADING2_TEXT}{text}{c.RESET}\n{underline_padding}{c.HEADING2_DECORATION}{line}{c.RESET}"
     
     def h3_decoration(self, text: str) -> str:
         c = self.colors
-        text_width = len(text)
-        center_offset = max(0, (self.terminal_width - text_width - 6) // 2)
+        heading_width = visible_width(text)
+        center_offset = max(0, (self.terminal_width - heading_width - 6) // 2)
         padding_str = " " * center_offset
         
         return f"{padding_str}{c.HEADING3_DECORATION}✧✧ {c.HEADING3_TEXT}{text}{c.HEADING3_DECORATION} ✧✧{c.RESET}"
@@ -198,23 +590,27 @@ class BoxDrawing:
         
         return f"{margin_str}{h4_color}→ {text}{c.RESET}"
     
-    def code_block_box(self, content: str, language: Optional[str] = None) -> str:
+    def highlight(self, content: str, language: str) -> Optional[str]:
+        """Return the highlighted form of ``content``, or None if it cannot be highlighted"""
+        highlighted_content = self.highlight_cache.get(language, self.code_style, content)
+        if highlighted_content is None:
+            highlighted_content = _pygments_highlight(self.lexer_pool, content, language, self.code_style)
+            if highlighted_content is not None:
+                self.highlight_cache.put(language, self.code_style, content, highlighted_content)
+        return highlighted_content
+    
+    def code_block_box(self, content: str, language: Optional[str] = None, highlighted: Optional[str] = None) -> str:
         c = self.colors
         
         if language and c.RESET:
-            try:
-                lexer = get_lexer_by_name(language, stripall=True)
-                formatter = Terminal256Formatter(style='monokai')
-                highlighted_content = pygments.highlight(content, lexer, formatter)
-                if highlighted_content.endswith('\n'):
-                    highlighted_content = highlighted_content[:-1]
-                lines = highlighted_content.split('\n')
-            except (ClassNotFound, ImportError):
-                lines = content.split('\n')
+            if highlighted is None:
+                highlighted = self.highlight(content, language)
+            lines = highlighted.split('\n') if highlighted is not None else content.split('\n')
         else:
             lines = content.split('\n')
         
-        max_line_length = max(len(re.sub(r'\x1b\[[0-9;]*m', '', line)) for line in lines)
+        line_widths = [visible_width(line) for line in lines]
+        max_line_length = max(line_widths)
         result = []
         
         bg_color = "\033[48;5;235m"
@@ -227,9 +623,8 @@ class BoxDrawing:
         indent = "    "
         result.append(f"{indent}{c.CODE_BLOCK_BORDER}╶{'─' * (max_line_length + 8)}╴{c.RESET}")
         
-        for i, line in enumerate(lines, 1):
-            clean_line = re.sub(r'\x1b\[[0-9;]*m', '', line)
-            padding_right = max(0, max_line_length - len(clean_line))
+        for i, (line, line_width) in enumerate(zip(lines, line_widths), 1):
+            padding_right = max(0, max_line_length - line_width)
             
             line_num = f"{bg_color}{c.CODE_BLOCK_LINE_NUM}{i:2d}{' '} {c.CODE_BLOCK_LINE_NUM}│ "
             
@@ -250,7 +645,7 @@ class BoxDrawing:
         
         for i in range(len(lines)):
             lines[i] = lines[i].replace("\"", "\"")
-            
+        
         if lines and not lines[0].startswith("\""):
             lines[0] = "\"" + lines[0]
         if lines and not lines[-1].endswith("\""):
@@ -285,31 +680,40 @@ class BoxDrawing:
         
         for line in lines[1:]:
             result.append(f"{c.COMMENT_TEXT}     {line}")
-            
+        
         result.append(f"{c.COMMENT_TEXT} -->{c.RESET}")
         
         return "\n".join(result)
     
     def table_box(self, table) -> str:
+        return "".join(self.iter_table_box(table))
+    
+    def iter_table_box(self, table) -> Iterator[str]:
+        """Yield the table box in pieces of at most ``TABLE_CHUNK_ROWS`` data rows.
+        
+        Every cell is measured and rendered once, in a single pass that also
+        settles the column widths; rows are then laid out from those results
+        chunk by chunk. Joined, the pieces equal ``table_box(table)``.
+        """
         c = self.colors
-        result = []
         
         if not table.headers or not isinstance(table, Table):
-            return "[Invalid Table]"
+            yield "[Invalid Table]"
+            return
         
+        started = time.perf_counter()
         col_count = len(table.headers)
-        col_widths = [0] * col_count
-        
-        for i, header in enumerate(table.headers):
-            if i < col_count:
-                header_text = self._get_plain_text(header.content)
-                col_widths[i] = max(col_widths[i], len(header_text))
+        cell_cache = {}
         
+        headers = [self._measure_cell(header.content, cell_cache) for header in table.headers]
+        col_widths = [plain_width for _, _, plain_width in headers]
+        rows = []
         for row in table.rows:
-            for i, cell in enumerate(row):
-                if i < col_count:
-                    cell_text = self._get_plain_text(cell.content)
-                    col_widths[i] = max(col_widths[i], len(cell_text))
+            cells = [self._measure_cell(cell.content, cell_cache) for cell in row[:col_count]]
+            for i, (_, _, plain_width) in enumerate(cells):
+                if plain_width > col_widths[i]:
+                    col_widths[i] = plain_width
+            rows.append(cells)
         
         col_widths = [w + 2 for w in col_widths]
         
@@ -319,18 +723,19 @@ class BoxDrawing:
         # Calculate centering padding
         center_padding = " " * max(0, (self.terminal_width - table_width) // 2)
         
+        result = []
+        
         # Build table with centering - properly formatted borders
         result.append(f"{center_padding}{c.TABLE_BORDER}╭{'─' * col_widths[0]}{'┬'.join(['─' * w for w in col_widths[1:]])}╮{c.RESET}")
         
         # Build header row properly
         header_row = f"{c.TABLE_BORDER}│"
         for i, header in enumerate(table.headers):
-            if i < col_count:
-                header_content = self._render_inline_content(header.content)
-                aligned_content = self._align_text(header_content, col_widths[i], header.alignment)
-                header_row += f"{c.TABLE_HEADER_BG}{c.TABLE_HEADER_TEXT}{aligned_content}{c.RESET}{c.TABLE_BORDER}"
-                if i < col_count - 1:
-                    header_row += "│"
+            rendered, rendered_width, _ = headers[i]
+            aligned_content = self._pad(rendered, rendered_width, col_widths[i], header.alignment)
+            header_row += f"{c.TABLE_HEADER_BG}{c.TABLE_HEADER_TEXT}{aligned_content}{c.RESET}{c.TABLE_BORDER}"
+            if i < col_count - 1:
+                header_row += "│"
         header_row += f"│{c.RESET}"
         result.append(f"{center_padding}{header_row}")
         
@@ -346,29 +751,54 @@ class BoxDrawing:
                 separator_row += f":{'─' * (width - 1)}"
             else:
                 separator_row += '─' * width
-                
+            
             if i < col_count - 1:
                 separator_row += "┼"
-                
+        
         separator_row += f"┤{c.RESET}"
         result.append(f"{center_padding}{separator_row}")
         
-        # Build data rows properly
+        # Build data rows properly, yielding every TABLE_CHUNK_ROWS rows.
+        # Repeated values in a column are padded once
+        cell_end = f"{c.RESET}{c.TABLE_BORDER}"
+        row_start = f"{center_padding}{c.TABLE_BORDER}│"
+        row_end = f"│{c.RESET}"
+        cell_starts = (f"{c.TABLE_ROW_ODD}{c.TABLE_TEXT}", f"{c.TABLE_ROW_EVEN}{c.TABLE_TEXT}")
+        cell_separators = tuple(f"{cell_end}│{cell_start}" for cell_start in cell_starts)
+        aligned_cache = {}
+        chunk_rows = self.TABLE_CHUNK_ROWS
+        counted = 0
         for row_idx, row in enumerate(table.rows):
-            bg_color = c.TABLE_ROW_ODD if row_idx % 2 == 0 else c.TABLE_ROW_EVEN
-            data_row = f"{c.TABLE_BORDER}│"
+            cells = rows[row_idx]
+            rows[row_idx] = None
             
-            for i, cell in enumerate(row):
-                if i < col_count:
-                    cell_content = self._render_inline_content(cell.content)
-                    aligned_content = self._align_text(cell_content, col_widths[i], cell.alignment)
-                    data_row += f"{bg_color}{c.TABLE_TEXT}{aligned_content}{c.RESET}{c.TABLE_BORDER}"
-                    if i < col_count - 1:
-                        data_row += "│"
+            aligned = []
+            for i, measured in enumerate(cells):
+                key = (i, row[i].alignment, measured)
+                aligned_content = aligned_cache.get(key)
+                if aligned_content is None:
+                    aligned_content = self._pad(measured[0], measured[1], col_widths[i], row[i].alignment)
+                    if len(aligned_cache) < self.CELL_CACHE_SIZE:
+                        aligned_cache[key] = aligned_content
+                aligned.append(aligned_content)
             
-            data_row += f"│{c.RESET}"
-            result.append(f"{center_padding}{data_row}")
+            if aligned:
+                parity = row_idx % 2
+                data_row = f"{row_start}{cell_starts[parity]}{cell_separators[parity].join(aligned)}{cell_end}"
+                # Short rows keep the separator after their last cell
+                if len(aligned) < col_count:
+                    data_row += "│"
+                result.append(data_row + row_end)
+            else:
+                result.append(row_start + row_end)
             
+            if (row_idx + 1) % chunk_rows == 0 and row_idx + 1 < len(table.rows):
+                self._count_table_rows(row_idx + 1 - counted, started)
+                counted = row_idx + 1
+                yield "\n".join(result) + "\n"
+                result = []
+                started = time.perf_counter()
+        
         # Proper bottom border with rounded corners
         border_bottom = f"{c.TABLE_BORDER}╰"
         for i, width in enumerate(col_widths):
@@ -378,10 +808,64 @@ class BoxDrawing:
         border_bottom += f"╯{c.RESET}"
         result.append(f"{center_padding}{border_bottom}")
         
-        return "\n".join(result)
+        self._count_table_rows(len(table.rows) - counted, started)
+        self.tables_rendered += 1
+        yield "\n".join(result)
+    
+    def _measure_cell(self, content, cell_cache: dict) -> tuple:
+        """Return (rendered text, its visible width, plain text width) for a table cell.
+        
+        Cells that are a single run of text, plain or styled, are remembered in
+        ``cell_cache``, which pays off for the repeated values of data dumps.
+        """
+        if len(content) != 1:
+            key = None
+        elif isinstance(content[0], str):
+            key = content[0]
+        else:
+            # A single styled run such as **error** or `0x1f`
+            item = content[0]
+            inner = item.content
+            if isinstance(inner, str):
+                key = (item.type, item.url, inner)
+            elif len(inner) == 1 and isinstance(inner[0], str):
+                key = (item.type, item.url, inner[0])
+            else:
+                key = None
+        
+        if key is not None:
+            measured = cell_cache.get(key)
+            if measured is not None:
+                self.cell_cache_hits += 1
+                return measured
+        
+        if isinstance(key, str):
+            measured = (key, visible_width(key), text_width(key))
+        else:
+            rendered = self._render_inline_content(content)
+            measured = (rendered, visible_width(rendered), text_width(self._get_plain_text(content)))
+        if key is not None and len(cell_cache) < self.CELL_CACHE_SIZE:
+            cell_cache[key] = measured
+        return measured
+    
+    def _count_table_rows(self, rows: int, started: float) -> None:
+        self.table_rows += rows
+        self.table_seconds += time.perf_counter() - started
+    
+    def table_stats(self) -> dict:
+        """Table rows rendered so far and the time spent on them, excluding time spent by the consumer"""
+        return {
+            "tables": self.tables_rendered,
+            "rows": self.table_rows,
+            "seconds": self.table_seconds,
+            "rows_per_second": self.table_rows / self.table_seconds if self.table_seconds else 0.0,
+            "cell_cache_hits": self.cell_cache_hits,
+        }
     
     def _align_text(self, text, width, alignment):
-        text_width = len(re.sub(r'\x1b\[[0-9;]*m', '', text))
+        return self._pad(text, visible_width(text), width, alignment)
+    
+    def _pad(self, text, text_width, width, alignment):
         padding = width - text_width
         
         if alignment == 'right':
@@ -403,7 +887,7 @@ class BoxDrawing:
                     result += self._get_plain_text(item.content)
                 elif isinstance(item.content, str):
                     result += item.content
-                    
+        
         return result
     
     def _render_inline_content(self, content):
@@ -428,9 +912,111 @@ class BoxDrawing:
         
         return result
 
+def _decoded_nbytes(image, file_size: int) -> int:
+    """Estimate the memory held by a decoded image: four bytes per pixel, or the file size when unknown"""
+    try:
+        width, height = image.original_size
+        return width * height * 4
+    except Exception:
+        return file_size
+
+
+class ImageCache:
+    """LRU cache of decoded images bounded by their estimated decoded size in bytes.
+    
+    Entries remember the modification time and size of their file and are
+    dropped when either changes, so a long-running process never serves a
+    stale image. Images larger than the whole budget are not kept.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, image, nbytes)
+        # Prefetch threads decode into the cache while the renderer reads it
+        self._lock = threading.Lock()
+        # Striped by path; held while a cached image is resized and formatted
+        self._image_locks = [threading.Lock() for _ in range(16)]
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+    
+    def get(self, path: str, stat: os.stat_result):
+        """Return the cached image for ``path`` if it was decoded from the file ``stat`` describes"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry[2]
+                self.invalidations += 1
+                self._discard(path)
+            
+            self.misses += 1
+            return None
+    
+    def put(self, path: str, stat: os.stat_result, image) -> None:
+        nbytes = _decoded_nbytes(image, stat.st_size)
+        with self._lock:
+            self._discard(path)
+            if nbytes > self.max_bytes:
+                return
+            
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, image, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, _, _, evicted_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+                self.evictions += 1
+    
+    def image_lock(self, path: str) -> threading.Lock:
+        """The lock to hold while changing the size of, or formatting, the cached image for ``path``.
+        
+        Images are shared by every renderer using this cache, so the lock
+        lives here rather than on a renderer.
+        """
+        return self._image_locks[hash(path) % len(self._image_locks)]
+    
+    def _discard(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.nbytes -= entry[3]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+    
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
 class TermImageRenderer:
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, cache: Optional[ImageCache] = None, colors: Optional[ColorConfig] = None):
+        self.cache = cache if cache is not None else ImageCache()
+        self.colors = colors if colors is not None else ColorConfig.shared()
+        # Tallest image in rows, leaving room for the caption and prompt like term-image does
+        try:
+            self.max_rows = max(1, shutil.get_terminal_size()[1] - 2)
+        except (AttributeError, ValueError, OSError):
+            self.max_rows = 22
+        self._pending = {}  # path -> future of a prefetched decode
         # Check for kitty terminal protocol support
         self.kitty_support = self._check_kitty_support()
     
@@ -439,106 +1025,582 @@ class TermImageRenderer:
         return os.environ.get('TERM') == 'xterm-kitty' or 'KITTY_WINDOW_ID' in os.environ
     
     def can_render_images(self):
-        return TERM_IMAGE_AVAILABLE
+        return _load_term_image() is not None
+    
+    def _decode(self, img_path: str, presize: bool = False) -> tuple:
+        """Load ``img_path`` through the cache; returns (image, None) or (None, placeholder text)"""
+        try:
+            stat = os.stat(img_path)
+        except (OSError, ValueError):
+            return None, f"[Image Not Found: {img_path}]"
+        
+        image = self.cache.get(img_path, stat)
+        if image is None:
+            try:
+                # Let term-image's from_file function automatically detect the best renderer
+                image = _load_term_image().from_file(img_path)
+            except Exception as e:
+                return None, f"[Image Error: {str(e)}] ({img_path})"
+            if presize:
+                try:
+                    image.set_size()
+                except Exception:
+                    pass
+            self.cache.put(img_path, stat, image)
+        return image, None
+    
+    def prefetch(self, img_path: str, executor) -> None:
+        """Start decoding ``img_path`` on ``executor``; ``render_image`` picks up the result"""
+        if img_path and img_path not in self._pending:
+            self._pending[img_path] = executor.submit(self._decode, img_path, True)
+    
+    def cancel_prefetch(self) -> None:
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
     
-    def render_image(self, img_path: str, caption: str = None) -> str:
+    def render_image(self, img_path: str, caption: str = None, columns: Optional[int] = None) -> str:
+        """Render the image at ``img_path`` to a string, fitted and centered in ``columns`` cells.
+        
+        ``columns`` defaults to the terminal width. The image is formatted
+        straight to a string instead of being drawn to stdout, so several
+        threads can render images at once.
+        """
         if not self.can_render_images():
             return f"[Image: {caption or ''}] ({img_path})"
         
-        if not os.path.exists(img_path):
-            return f"[Image Not Found: {img_path}]"
+        future = self._pending.pop(img_path, None)
+        image, error = future.result() if future is not None else self._decode(img_path)
+        if error is not None:
+            return error
         
-        if img_path not in self.cache:
+        if columns is None:
             try:
-                # Let term-image's from_file function automatically detect the best renderer
-                self.cache[img_path] = from_file(img_path)
-            except Exception as e:
-                return f"[Image Error: {str(e)}] ({img_path})"
+                columns = shutil.get_terminal_size()[0]
+            except (AttributeError, ValueError, OSError):
+                columns = 80
         
-        image = self.cache[img_path]
+        # Sizing changes the cached image object, so renders of one image take turns, across renderers too
+        with self.cache.image_lock(img_path):
+            try:
+                image.set_size(frame_size=(columns, self.max_rows))
+                # Centered in ``columns``; a padding height of 1 adds no blank rows around the image
+                rendered = format(image, f"|{columns}.1")
+            except Exception as e:
+                # If formatting failed, try simpler approach
+                try:
+                    return f"{str(image)}\n[{caption or ''} ({img_path})]"
+                except Exception:
+                    return f"[Image Rendering Error: {str(e)}] ({img_path})"
         
-        try:
-            # Use the image directly - term-image handles rendering
-            # We'll use draw() to get a string representation (draw returns None)
-            import io
-            import sys
-            
-            # Capture image output from image.draw()
-            old_stdout = sys.stdout
-            new_stdout = io.StringIO()
-            sys.stdout = new_stdout
-            
-            image.draw()
+        # Add caption if provided
+        if caption:
+            c = self.colors.IMAGE_CAPTION
+            reset = self.colors.RESET
+            path_color = self.colors.IMAGE_PATH
             
-            # Restore stdout and get captured output
-            sys.stdout = old_stdout
-            rendered = new_stdout.getvalue()
+            # Calculate visible length (without counting color codes)
+            visible_length = visible_width(caption) + text_width(img_path) + 3  # +3 for " ()" around the path
             
-            # Add caption if provided
-            if caption:
-                c = ColorConfig().IMAGE_CAPTION
-                reset = ColorConfig().RESET
-                path_color = ColorConfig().IMAGE_PATH
-                
-                try:
-                    terminal_width = shutil.get_terminal_size()[0]
-                except (AttributeError, ValueError, OSError):
-                    terminal_width = 80
-                
-                # Calculate visible length (without counting color codes)
-                visible_length = len(caption) + len(img_path) + 3  # +3 for " ()" around the path
-                
-                # Add padding to center the caption
-                center_padding = " " * max(0, (terminal_width - visible_length) // 2)
-                
-                return f"{rendered}\n{center_padding}{c}{caption}{reset} {path_color}({img_path}){reset}"
-            else:
-                return rendered
+            # Add padding to center the caption
+            center_padding = " " * max(0, (columns - visible_length) // 2)
             
-        except Exception as e:
-            # If capturing output failed, try simpler approach
-            try:
-                return f"{str(image)}\n[{caption or ''} ({img_path})]"
-            except:
-                return f"[Image Rendering Error: {str(e)}] ({img_path})"
+            return f"{rendered}\n{center_padding}{c}{caption}{reset} {path_color}({img_path}){reset}"
+        else:
+            return rendered
+
+
+def _image_urls(element: MarkdownElement) -> Iterator[str]:
+    """Yield the url of every image rendered as part of ``element``; tables do not render images"""
+    if element.type == ElementType.IMAGE:
+        yield element.url
+    content = element.content
+    if isinstance(content, str) or element.type == ElementType.TABLE:
+        return
+    for item in content:
+        if isinstance(item, MarkdownElement):
+            yield from _image_urls(item)
+        elif isinstance(item, list):  # List items
+            for inline in item:
+                if isinstance(inline, MarkdownElement):
+                    yield from _image_urls(inline)
+
+
+class RenderProfiler:
+    """Wall time, call count and output size of parsing, rendering and helper calls.
+    
+    Parse and render entries are keyed by element type, helper entries by
+    ``Class.method``. Helper times include the helpers they call, so the
+    sections overlap and are not meant to be added up.
+    """
+    SECTIONS = ("parse", "render", "helper")
+    
+    def __init__(self):
+        # (section, name) -> [calls, seconds, output bytes]
+        self.records = {}
+    
+    def record(self, section: str, name: str, seconds: float, output: Optional[str] = None) -> None:
+        entry = self.records.get((section, name))
+        if entry is None:
+            entry = self.records[section, name] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        if output:
+            entry[2] += len(output.encode("utf-8"))
+    
+    def wrap(self, section: str, name: str, function):
+        """``function`` with each call recorded under ``name``"""
+        clock = time.perf_counter
+        
+        def profiled(*args, **kwargs):
+            started = clock()
+            result = function(*args, **kwargs)
+            self.record(section, name, clock() - started, result if isinstance(result, str) else None)
+            return result
+        
+        return profiled
+    
+    def wrap_iterator(self, section: str, name: str, function):
+        """Like ``wrap`` for a generator function: one call covers every piece it yields"""
+        def profiled(*args, **kwargs):
+            return self.iter_steps(section, name, function(*args, **kwargs))
+        
+        return profiled
+    
+    def iter_steps(self, section: str, name: str, iterator: Iterable[str]) -> Iterator[str]:
+        """Pass ``iterator`` through, recording the time spent producing its pieces as one call"""
+        clock = time.perf_counter
+        iterator = iter(iterator)
+        seconds = 0.0
+        size = 0
+        try:
+            while True:
+                started = clock()
+                piece = next(iterator, None)
+                seconds += clock() - started
+                if piece is None:
+                    return
+                size += len(piece.encode("utf-8"))
+                yield piece
+        finally:
+            entry = self.records.setdefault((section, name), [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += size
+    
+    def iter_elements(self, section: str, elements: Iterable[MarkdownElement]) -> Iterator[MarkdownElement]:
+        """Pass ``elements`` through, recording the time taken to produce each one under its type"""
+        clock = time.perf_counter
+        elements = iter(elements)
+        while True:
+            started = clock()
+            element = next(elements, None)
+            seconds = clock() - started
+            if element is None:
+                return
+            self.record(section, element.type.name.lower(), seconds)
+            yield element
+    
+    def instrument(self, obj, names: Iterable[str]) -> None:
+        """Record every call of the named methods of ``obj`` as helpers, by shadowing them on the instance"""
+        import inspect
+        
+        owner = type(obj).__name__
+        for name in names:
+            method = getattr(obj, name)
+            wrap = self.wrap_iterator if inspect.isgeneratorfunction(method) else self.wrap
+            setattr(obj, name, wrap("helper", f"{owner}.{name}", method))
+    
+    def stats(self) -> dict:
+        """``{section: {name: {"calls", "seconds", "output_bytes"}}}`` for everything recorded"""
+        stats = {section: {} for section in self.SECTIONS}
+        for (section, name), (calls, seconds, size) in self.records.items():
+            stats.setdefault(section, {})[name] = {"calls": calls, "seconds": seconds, "output_bytes": size}
+        return stats
+    
+    def summary(self) -> str:
+        """A table of the records of each section, slowest first"""
+        lines = [f"{'section':<8} {'name':<36} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'output KB':>10}"]
+        for section, entries in self.stats().items():
+            for name, entry in sorted(entries.items(), key=lambda item: -item[1]["seconds"]):
+                calls = entry["calls"]
+                total_ms = entry["seconds"] * 1000
+                lines.append(
+                    f"{section:<8} {name:<36} {calls:>8} {total_ms:>10.2f} {total_ms / calls if calls else 0.0:>9.3f} "
+                    f"{entry['output_bytes'] / 1024:>10.1f}"
+                )
+        return "\n".join(lines) + "\n"
+
 
 class EnhancedMarkdownRenderer:
-    def __init__(self, colored_output=True):
+    # Elements examined per round of parallel highlighting
+    HIGHLIGHT_WINDOW = 256
+    # Most elements scanned ahead for images to decode in the background
+    IMAGE_PREFETCH_WINDOW = 64
+    # Blocks parsed per executor call by iter_render_async
+    ASYNC_PARSE_WINDOW = 32
+    # Helpers timed when the renderer has a profiler
+    PROFILED_BOX_METHODS = ("fancy_box", "h2_decoration", "h3_decoration", "h4_decoration", "highlight",
+                            "code_block_box", "blockquote_decoration", "horizontal_rule", "comment_box",
+                            "iter_table_box")
+    
+    def __init__(self, colored_output=True, highlight_cache: Optional[HighlightCache] = None,
+                 highlight_workers: int = 0, image_cache: Optional[ImageCache] = None,
+                 image_workers: int = 4, theme_seed: Optional[int] = None,
+                 document_cache: Optional[DocumentCache] = None, profiler: Optional[RenderProfiler] = None):
         self.parser = MarkdownParser()
-        self.colors = ColorConfig(colored_output)
-        self.box_tools = BoxDrawing(self.colors)
+        self.theme_seed = theme_seed
+        self.colors = ColorConfig.shared(colored_output, theme_seed)
+        # Opt-in store of whole rendered documents, used when the output is deterministic
+        self.document_cache = document_cache
+        self.box_tools = BoxDrawing(self.colors, highlight_cache)
         self.terminal_width = self.box_tools.terminal_width
-        self.image_renderer = TermImageRenderer()
+        self.image_renderer = TermImageRenderer(image_cache, self.colors)
+        self._block_cache = {}
+        self._block_cache_width = None
+        # With more than one worker, code blocks are highlighted in a process pool, started on first
+        # use and kept, with each worker's warm LexerPool, until ``close``
+        self.highlight_workers = highlight_workers
+        self._highlight_executor = None
+        self._prehighlighted = {}
+        # Images are decoded this many at a time ahead of the block being rendered; 0 decodes in place
+        self.image_workers = image_workers
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self.box_tools, self.PROFILED_BOX_METHODS)
+            profiler.instrument(self.image_renderer, ("render_image",))
+    
+    def __enter__(self) -> "EnhancedMarkdownRenderer":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Shut down the highlighting process pool, if one was started; a later render starts a new one"""
+        executor, self._highlight_executor = self._highlight_executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
     
     def render(self, md_text: str) -> str:
-        elements = self.parser.parse(md_text)
-        rendered_text = ""
+        key = self._document_key(md_text)
+        if key is not None:
+            rendered = self.document_cache.get(key)
+            if rendered is not None:
+                return rendered
+        
+        rendered = "".join(self.iter_render(md_text))
+        if key is not None:
+            self.document_cache.put(key, rendered)
+        return rendered
+    
+    def _document_key(self, md_text: str) -> Optional[str]:
+        """The document cache key for ``md_text``, or None when its output must not be reused"""
+        if self.document_cache is None:
+            return None
+        colored_output = bool(self.colors.RESET)
+        # Random heading colors differ per process, and images depend on files besides the source
+        if (colored_output and self.theme_seed is None) or "![" in md_text:
+            return None
+        return DocumentCache.key(md_text, self.terminal_width, self.theme_seed if colored_output else None,
+                                 colored_output, self.box_tools.code_style)
+    
+    def render_incremental(self, md_text: str) -> str:
+        """Render like ``render``, reusing the output of blocks unchanged since the previous call.
+        
+        The source is split into block spans and each span is keyed by a hash
+        of its text; only spans without a cached rendering are parsed and
+        rendered. The cache keeps just the blocks of the latest document.
+        """
+        if self._block_cache_width != self.terminal_width:
+            self._block_cache = {}
+            self._block_cache_width = self.terminal_width
+        
+        previous = self._block_cache
+        current = {}
+        rendered_blocks = []
+        
+        for block in self.parser.split_blocks(md_text):
+            key = hashlib.blake2b(block.encode("utf-8"), digest_size=16).digest()
+            rendered = current.get(key)
+            if rendered is None:
+                rendered = previous.get(key)
+            if rendered is None:
+                rendered = "".join(self._render_element(element) for element in self.parser.parse(block))
+            current[key] = rendered
+            rendered_blocks.append(rendered)
+        
+        self._block_cache = current
+        return "".join(rendered_blocks)
+    
+    def iter_render(self, source: Union[str, IO[str], FlatTree]) -> Iterator[str]:
+        """Yield the rendered text of each block as soon as it is rendered.
+        
+        ``source`` is either the Markdown text, a file object, which is
+        parsed lazily with ``MarkdownParser.iter_parse``, or a ``FlatTree``,
+        whose blocks are turned back into elements one at a time.
+        """
+        profiler = self.profiler
+        # Parsed lazily when profiling, so the time of each block can be told apart
+        elements = self._iter_elements(source, lazy=profiler is not None)
+        
+        if profiler is not None:
+            for element in elements:
+                name = element.type.name.lower()
+                if element.type == ElementType.TABLE:
+                    yield from profiler.iter_steps("render", name, self._iter_render_table(element))
+                else:
+                    started = time.perf_counter()
+                    rendered = self._render_element(element)
+                    profiler.record("render", name, time.perf_counter() - started, rendered)
+                    yield rendered
+            return
         
         for element in elements:
-            if element.type == ElementType.HEADING:
-                rendered_text += self._render_heading(element)
-            elif element.type == ElementType.PARAGRAPH:
-                rendered_text += self._render_paragraph(element)
-            elif element.type in [ElementType.DASH_RULE, ElementType.ASTERISK_RULE, ElementType.UNDERSCORE_RULE]:
-                rendered_text += self._render_horizontal_rule(element)
-            elif element.type == ElementType.CODE_BLOCK:
-                rendered_text += self._render_code_block(element)
-            elif element.type == ElementType.BLOCKQUOTE:
-                rendered_text += self._render_blockquote(element)
-            elif element.type in [ElementType.DASH_LIST, ElementType.ASTERISK_LIST, ElementType.PLUS_LIST]:
-                rendered_text += self._render_unordered_list(element)
-            elif element.type == ElementType.ORDERED_LIST:
-                rendered_text += self._render_ordered_list(element)
-            elif element.type == ElementType.TEXT:
-                rendered_text += self._render_text(element)
-            elif element.type == ElementType.IMAGE:
-                rendered_text += self._render_image(element)
-            elif element.type == ElementType.COMMENT:
-                rendered_text += self._render_comment(element)
-            elif element.type == ElementType.TABLE:
-                rendered_text += self._render_table(element)
-        
-        return rendered_text
+            if element.type == ElementType.TABLE:
+                yield from self._iter_render_table(element)
+            else:
+                yield self._render_element(element)
+    
+    def _iter_elements(self, source: Union[str, IO[str], FlatTree], lazy: bool = False) -> Iterable[MarkdownElement]:
+        """The blocks of ``source``, with highlighting and image decoding started ahead when configured.
+        
+        A string is parsed up front unless ``lazy`` is set.
+        """
+        if isinstance(source, str):
+            elements = self.parser.iter_parse(StringIO(source)) if lazy else self.parser.parse(source)
+        elif isinstance(source, FlatTree):
+            elements = source.iter_elements()
+        else:
+            elements = self.parser.iter_parse(source)
+        if self.profiler is not None:
+            elements = self.profiler.iter_elements("parse", elements)
+        
+        if self.highlight_workers > 1 and self.colors.RESET:
+            elements = self._iter_prehighlighted(elements)
+        if self.image_workers > 0:
+            elements = self._iter_prefetched_images(elements)
+        return elements
+    
+    async def render_async(self, md_text: str, executor=None) -> str:
+        """Render like ``render`` without blocking the event loop; see ``iter_render_async``"""
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        key = self._document_key(md_text)
+        if key is not None:
+            rendered = await loop.run_in_executor(executor, self.document_cache.get, key)
+            if rendered is not None:
+                return rendered
+        
+        rendered = "".join([chunk async for chunk in self.iter_render_async(md_text, executor)])
+        if key is not None:
+            await loop.run_in_executor(executor, self.document_cache.put, key, rendered)
+        return rendered
+    
+    async def iter_render_async(self, source: Union[str, IO[str], FlatTree], executor=None) -> AsyncIterator[str]:
+        """Yield the rendered text of each block like ``iter_render``, for use inside an event loop.
+        
+        Parsing, code blocks, blocks with images and each piece of a table run
+        in ``executor`` (the loop's default executor when None); other blocks
+        are cheap and render on the loop, which is given a turn after each.
+        Steps run one at a time, so use one renderer per document rendered
+        concurrently. Cancelling the consumer stops rendering after the step
+        in progress, whose result is dropped.
+        """
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        run = loop.run_in_executor
+        elements = self._iter_elements(source, lazy=True)
+        try:
+            while True:
+                batch = await run(executor, list, islice(elements, self.ASYNC_PARSE_WINDOW))
+                if not batch:
+                    return
+                
+                for element in batch:
+                    if element.type == ElementType.TABLE:
+                        pieces = self._iter_render_table(element)
+                        while True:
+                            piece = await run(executor, next, pieces, None)
+                            if piece is None:
+                                break
+                            yield piece
+                    elif element.type == ElementType.CODE_BLOCK or any(_image_urls(element)):
+                        yield await run(executor, self._render_element, element)
+                    else:
+                        yield self._render_element(element)
+                        await asyncio.sleep(0)
+        finally:
+            try:
+                elements.close()
+            except (AttributeError, ValueError):
+                # A list has nothing to close; a generator still running in the executor closes when dropped
+                pass
+    
+    def _iter_prehighlighted(self, elements: Iterable[MarkdownElement]) -> Iterator[MarkdownElement]:
+        """Pass ``elements`` through, highlighting the code blocks of each window concurrently first.
+        
+        Results are kept by element until ``_render_code_block`` picks them
+        up, so blocks are still rendered in document order.
+        """
+        box_tools = self.box_tools
+        style = box_tools.code_style
+        elements = iter(elements)
+        
+        try:
+            while True:
+                batch = list(islice(elements, self.HIGHLIGHT_WINDOW))
+                if not batch:
+                    return
+                
+                jobs = []
+                for element in batch:
+                    language = element.language
+                    if element.type != ElementType.CODE_BLOCK or not language or not isinstance(element.content, str):
+                        continue
+                    highlighted = box_tools.highlight_cache.get(language, style, element.content)
+                    if highlighted is None:
+                        jobs.append(element)
+                    else:
+                        self._prehighlighted[id(element)] = highlighted
+                
+                if jobs:
+                    executor = self._highlight_executor
+                    if executor is None:
+                        from concurrent.futures import ProcessPoolExecutor
+                        
+                        executor = self._highlight_executor = ProcessPoolExecutor(max_workers=self.highlight_workers)
+                    chunksize = max(1, len(jobs) // (self.highlight_workers * 4))
+                    results = executor.map(
+                        _highlight_in_worker,
+                        [element.content for element in jobs],
+                        [element.language for element in jobs],
+                        [style] * len(jobs),
+                        chunksize=chunksize,
+                    )
+                    for element, highlighted in zip(jobs, results):
+                        self._prehighlighted[id(element)] = highlighted
+                        if highlighted is not None:
+                            box_tools.highlight_cache.put(element.language, style, element.content, highlighted)
+                
+                yield from batch
+        finally:
+            self._prehighlighted.clear()
+    
+    def _iter_prefetched_images(self, elements: Iterable[MarkdownElement]) -> Iterator[MarkdownElement]:
+        """Pass ``elements`` through, decoding the images of the elements ahead in a thread pool.
+        
+        Nothing is read ahead, and term-image is not loaded, until an element
+        with an image turns up. From then on the lookahead grows by one
+        element per element passed on, up to ``IMAGE_PREFETCH_WINDOW``, so
+        images decode while earlier blocks are rendered but no element waits
+        for a whole window to be read; ``render_image`` waits for its own
+        decode only.
+        """
+        image_renderer = self.image_renderer
+        elements = iter(elements)
+        ahead = deque()
+        executor = None
+        # None until the first image is seen, then whether term-image can render it
+        enabled = None
+        
+        def scan(element: MarkdownElement) -> None:
+            nonlocal enabled, executor
+            for url in _image_urls(element):
+                if enabled is None:
+                    enabled = image_renderer.can_render_images()
+                if not enabled:
+                    return
+                if executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    
+                    executor = ThreadPoolExecutor(max_workers=self.image_workers)
+                image_renderer.prefetch(url, executor)
+        
+        try:
+            while True:
+                if ahead:
+                    element = ahead.popleft()
+                else:
+                    element = next(elements, None)
+                    if element is None:
+                        return
+                    scan(element)
+                
+                if enabled:
+                    for _ in range(2):
+                        if len(ahead) >= self.IMAGE_PREFETCH_WINDOW:
+                            break
+                        upcoming = next(elements, None)
+                        if upcoming is None:
+                            break
+                        scan(upcoming)
+                        ahead.append(upcoming)
+                
+                yield element
+        finally:
+            image_renderer.cancel_prefetch()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def render_to(self, source: Union[str, IO[str], FlatTree], stream: IO[str], buffer_size: int = 8192) -> None:
+        """Render ``source`` block by block into ``stream``, flushing every ``buffer_size`` characters.
+        
+        With a document cache the whole source is read first, so that a cached
+        rendering can be written without parsing anything.
+        """
+        key = None
+        if self.document_cache is not None and not isinstance(source, FlatTree):
+            if not isinstance(source, str):
+                source = source.read()
+            key = self._document_key(source)
+            rendered = self.document_cache.get(key) if key is not None else None
+            if rendered is not None:
+                stream.write(rendered)
+                stream.flush()
+                return
+        
+        chunks = [] if key is not None else None
+        unflushed = 0
+        for chunk in self.iter_render(source):
+            stream.write(chunk)
+            if chunks is not None:
+                chunks.append(chunk)
+            unflushed += len(chunk)
+            if unflushed >= buffer_size:
+                stream.flush()
+                unflushed = 0
+        stream.flush()
+        
+        if key is not None:
+            self.document_cache.put(key, "".join(chunks))
+    
+    def _render_element(self, element: MarkdownElement) -> str:
+        if element.type == ElementType.HEADING:
+            return self._render_heading(element)
+        elif element.type == ElementType.PARAGRAPH:
+            return self._render_paragraph(element)
+        elif element.type in [ElementType.DASH_RULE, ElementType.ASTERISK_RULE, ElementType.UNDERSCORE_RULE]:
+            return self._render_horizontal_rule(element)
+        elif element.type == ElementType.CODE_BLOCK:
+            return self._render_code_block(element)
+        elif element.type == ElementType.BLOCKQUOTE:
+            return self._render_blockquote(element)
+        elif element.type in [ElementType.DASH_LIST, ElementType.ASTERISK_LIST, ElementType.PLUS_LIST]:
+            return self._render_unordered_list(element)
+        elif element.type == ElementType.ORDERED_LIST:
+            return self._render_ordered_list(element)
+        elif element.type == ElementType.TEXT:
+            return self._render_text(element)
+        elif element.type == ElementType.IMAGE:
+            return self._render_image(element)
+        elif element.type == ElementType.COMMENT:
+            return self._render_comment(element)
+        elif element.type == ElementType.TABLE:
+            return self._render_table(element)
+        return ""
     
     def _render_heading(self, element: MarkdownElement) -> str:
         content = self._render_inline_content(element.content)
@@ -555,7 +1617,7 @@ class EnhancedMarkdownRenderer:
     
     def _render_paragraph(self, element: MarkdownElement) -> str:
         content = self._render_inline_content(element.content)
-        wrapped_text = textwrap.fill(content, width=self.terminal_width - 4)
+        wrapped_text = fill(content, width=self.terminal_width - 4)
         return f"{wrapped_text}\n\n"
     
     def _render_horizontal_rule(self, element: MarkdownElement) -> str:
@@ -563,8 +1625,9 @@ class EnhancedMarkdownRenderer:
         return f"\n{self.box_tools.horizontal_rule(style)}\n\n"
     
     def _render_code_block(self, element: MarkdownElement) -> str:
-        language = getattr(element, 'language', '')
-        return f"\n{self.box_tools.code_block_box(element.content, language)}\n\n"
+        language = element.language
+        highlighted = self._prehighlighted.pop(id(element), None)
+        return f"\n{self.box_tools.code_block_box(element.content, language, highlighted)}\n\n"
     
     def _render_blockquote(self, element: MarkdownElement) -> str:
         content = self._render_inline_content(element.content)
@@ -582,7 +1645,7 @@ class EnhancedMarkdownRenderer:
         
         for item in element.content:
             item_content = self._render_inline_content(item)
-            wrapped_content = textwrap.fill(
+            wrapped_content = fill(
                 item_content, 
                 width=self.terminal_width - 10,
                 initial_indent="    " + bullet,
@@ -601,7 +1664,7 @@ class EnhancedMarkdownRenderer:
             bullet_idx = (i - 1) % 10
             num_str = f"{c.LIST_NUMBER}{self.box_tools.numbered_bullets[bullet_idx]} {c.RESET}"
             
-            wrapped_content = textwrap.fill(
+            wrapped_content = fill(
                 item_content, 
                 width=self.terminal_width - 10,
                 initial_indent="    " + num_str,
@@ -618,13 +1681,19 @@ class EnhancedMarkdownRenderer:
         alt_text = self._render_inline_content(element.content) if element.content else ""
         image_path = element.url if element.url else ""
         
-        return f"\n{self.image_renderer.render_image(image_path, alt_text)}\n\n"
+        return f"\n{self.image_renderer.render_image(image_path, alt_text, self.terminal_width)}\n\n"
     
     def _render_comment(self, element: MarkdownElement) -> str:
         return ""
     
     def _render_table(self, element: MarkdownElement) -> str:
-        return f"\n{self.box_tools.table_box(element.content)}\n\n"
+        return "".join(self._iter_render_table(element))
+    
+    def _iter_render_table(self, element: MarkdownElement) -> Iterator[str]:
+        """Yield a rendered table in bounded pieces so huge tables stream like other blocks"""
+        yield "\n"
+        yield from self.box_tools.iter_table_box(element.content)
+        yield "\n\n"
     
     def _render_inline_content(self, content: List[Union[str, MarkdownElement]]) -> str:
         result = ""
@@ -644,27 +1713,251 @@ class EnhancedMarkdownRenderer:
                 elif item.type == ElementType.IMAGE:
                     alt_text = self._render_inline_content(item.content) if item.content else ""
                     image_path = item.url if item.url else ""
-                    return self.image_renderer.render_image(image_path, alt_text)
+                    return self.image_renderer.render_image(image_path, alt_text, self.terminal_width)
                 elif item.type == ElementType.COMMENT:
                     result += f"{self.colors.COMMENT_TEXT}<!-- {item.content} -->{self.colors.RESET}"
         
         return result
 
 def render_markdown(md_text: str) -> str:
-    import sys
     return EnhancedMarkdownRenderer(sys.stdout.isatty()).render(md_text)
 
-if __name__ == "__main__":
-    import sys
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+
+
+def expand_inputs(patterns: List[str]) -> List[tuple]:
+    """Expand files, directories and glob patterns into (path, output relative path) pairs.
+    
+    Directories are searched recursively for Markdown files and glob
+    matches are taken relative to the pattern's leading non-magic
+    directories, so both keep their layout below the output directory;
+    single files use their base name.
+    """
+    import glob
+    
+    inputs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(MARKDOWN_SUFFIXES):
+                        path = os.path.join(root, name)
+                        inputs.append((path, os.path.relpath(path, pattern)))
+        elif glob.has_magic(pattern):
+            root = pattern
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    inputs.append((path, os.path.relpath(path, root or os.curdir)))
+        else:
+            inputs.append((pattern, os.path.basename(pattern)))
+    return inputs
+
+
+_batch_renderer = None
+
+
+def _init_batch_worker(colored_output: bool, highlight_workers: int, theme_seed: int,
+                       cache_dir: Optional[str] = None, highlight_cache_dir: Optional[str] = None) -> None:
+    """Build the renderer a batch worker reuses for every file, keeping its lexers and theme warm"""
+    global _batch_renderer
+    # Every worker builds the same heading colors
+    _batch_renderer = EnhancedMarkdownRenderer(colored_output, highlight_workers=highlight_workers,
+                                               theme_seed=theme_seed,
+                                               document_cache=DocumentCache(cache_dir) if cache_dir else None,
+                                               highlight_cache=HighlightCache(cache_dir=highlight_cache_dir))
+
+
+def _render_batch_file(path: str, output_path: Optional[str]) -> tuple:
+    """Render one file with the worker's renderer.
+    
+    Returns (path, bytes read, rendered text or None when written to
+    ``output_path``, error message or None). Output is written to a temp
+    file that replaces ``output_path`` only once the file rendered, so a
+    failure never leaves a partial output behind.
+    """
+    import tempfile
+    
+    tmp_path = None
+    try:
+        with open(path, "r") as md_file:
+            if output_path is None:
+                rendered = _batch_renderer.render(md_file.read())
+                return path, os.path.getsize(path), rendered, None
+            
+            out_dir = os.path.dirname(output_path) or "."
+            os.makedirs(out_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".tmp-", suffix=".ans")
+            with os.fdopen(fd, "w") as out_file:
+                _batch_renderer.render_to(md_file, out_file)
+            os.replace(tmp_path, output_path)
+            tmp_path = None
+            return path, os.path.getsize(path), None, None
+    except OSError as e:
+        return path, 0, None, str(e)
+    except Exception as e:
+        # Undecodable input or a rendering bug fails this file only
+        return path, 0, None, f"{path}: {type(e).__name__}: {e}"
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def render_batch(inputs: List[tuple], output_dir: Optional[str] = None, jobs: int = 1,
+                 colored_output: bool = True, stream: IO[str] = None, report: IO[str] = None,
+                 theme_seed: Optional[int] = None, cache_dir: Optional[str] = None,
+                 highlight_cache_dir: Optional[str] = None) -> int:
+    """Render many files, either into ``output_dir`` or to ``stream`` with a header before each file.
+    
+    Work is spread over ``jobs`` worker processes. A throughput summary is
+    written to ``report``. With ``cache_dir`` the workers share a document
+    cache there, and with ``highlight_cache_dir`` highlighted code. Returns the number of files that failed.
+    """
+    stream = stream or sys.stdout
+    report = report or sys.stderr
+    if theme_seed is None:
+        theme_seed = random.randrange(2 ** 32)
+    tasks = []
+    failures = 0
+    claimed = {}
+    for path, relative in inputs:
+        output_path = os.path.join(output_dir, os.path.splitext(relative)[0] + ".ans") if output_dir else None
+        if output_path is not None:
+            # Two inputs with the same output would overwrite each other, or race between workers
+            key = os.path.normcase(os.path.abspath(output_path))
+            if key in claimed:
+                failures += 1
+                report.write(f"Error: {path} and {claimed[key]} would both be written to {output_path}\n")
+                continue
+            claimed[key] = path
+        tasks.append((path, output_path))
     
-    if len(sys.argv) > 1:
+    start = time.perf_counter()
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                                       initargs=(colored_output, 0, theme_seed, cache_dir, highlight_cache_dir))
+        results = executor.map(_render_batch_file, *zip(*tasks), chunksize=max(1, len(tasks) // (jobs * 8)))
+    else:
+        executor = None
+        _init_batch_worker(colored_output, 0, theme_seed, cache_dir, highlight_cache_dir)
+        results = (_render_batch_file(path, output_path) for path, output_path in tasks)
+    
+    total_bytes = 0
+    try:
+        for index, (path, size, rendered, error) in enumerate(results):
+            if error:
+                failures += 1
+                report.write(f"Error: {error}\n")
+                continue
+            total_bytes += size
+            if rendered is not None:
+                if index:
+                    stream.write("\n")
+                stream.write(f"==> {path} <==\n{rendered}")
+                stream.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    elapsed = time.perf_counter() - start
+    rendered_count = len(inputs) - failures
+    rate = rendered_count / elapsed if elapsed else 0.0
+    megabytes = total_bytes / (1024 * 1024)
+    report.write(
+        f"Rendered {rendered_count} file(s), {megabytes:.2f} MB in {elapsed:.2f}s "
+        f"({rate:.1f} files/s, {megabytes / elapsed if elapsed else 0.0:.2f} MB/s) with {jobs} worker(s)\n"
+    )
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import glob
+    
+    arg_parser = argparse.ArgumentParser(description="Render Markdown for the terminal.")
+    arg_parser.add_argument("inputs", nargs="*", help="Markdown files, directories or glob patterns")
+    arg_parser.add_argument("-o", "--output-dir", help="write each rendered file here (as .ans) instead of stdout")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for batch rendering")
+    arg_parser.add_argument("--color", choices=("auto", "always", "never"), default="auto",
+                            help="colorize output (auto: only when stdout is a terminal)")
+    arg_parser.add_argument("--theme-seed", type=int, help="seed for the heading colors, for reproducible output")
+    arg_parser.add_argument("--cache", action="store_true",
+                            help="reuse rendered documents and highlighted code from the on-disk caches "
+                                 "(implies --theme-seed 0 if unset)")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="print the time spent per block kind, element type and helper to stderr")
+    arg_parser.add_argument("--pager", action="store_true",
+                            help="page through the file, rendering blocks as they scroll into view")
+    args = arg_parser.parse_args(argv)
+    
+    colored_output = sys.stdout.isatty() if args.color == "auto" else args.color == "always"
+    theme_seed = args.theme_seed
+    cache_dir = highlight_cache_dir = None
+    if args.cache:
+        cache_dir = DocumentCache.default_dir()
+        highlight_cache_dir = HighlightCache.default_dir()
+        if theme_seed is None:
+            theme_seed = 0
+    
+    batch = (args.output_dir or len(args.inputs) > 1 or args.jobs > 1
+             or any(os.path.isdir(p) or glob.has_magic(p) for p in args.inputs))
+    if batch and (args.profile or args.pager):
+        arg_parser.error("--profile and --pager work with a single input file")
+    if batch:
+        inputs = expand_inputs(args.inputs)
+        if not inputs:
+            print("Error: no Markdown files matched.", file=sys.stderr)
+            return 1
+        failures = render_batch(inputs, args.output_dir, max(1, args.jobs), colored_output,
+                                theme_seed=theme_seed, cache_dir=cache_dir, highlight_cache_dir=highlight_cache_dir)
+        return 1 if failures else 0
+    
+    # A profiled document is always rendered, never read back from the cache
+    profiler = RenderProfiler() if args.profile else None
+    # The pager renders one block at a time, too few to prefetch images for
+    paged = args.pager and sys.stdout.isatty()
+    renderer = EnhancedMarkdownRenderer(colored_output, theme_seed=theme_seed,
+                                        document_cache=DocumentCache(cache_dir) if cache_dir and not profiler else None,
+                                        highlight_cache=HighlightCache(cache_dir=highlight_cache_dir),
+                                        profiler=profiler, image_workers=0 if paged else 4)
+    if args.inputs:
         try:
-            with open(sys.argv[1], "r") as f:
-                md_text = f.read()
+            md_file = open(args.inputs[0], "r")
         except FileNotFoundError:
-            print(f"Error: File '{sys.argv[1]}' not found.")
-            sys.exit(1)
-    else:
-        md_text = "# Markdown Example"
+            print(f"Error: File '{args.inputs[0]}' not found.")
+            return 1
     
-    print(render_markdown(md_text))
+    try:
+        if args.inputs:
+            with md_file:
+                if paged:
+                    from pager import Pager
+                    
+                    Pager(renderer, md_file.read()).run(sys.stdout, args.inputs[0])
+                else:
+                    renderer.render_to(md_file, sys.stdout)
+        else:
+            renderer.render_to("# Markdown Example", sys.stdout)
+        
+        if not paged:
+            sys.stdout.write("\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (head, or a pager quit early) went away. Point stdout at devnull so the flush at exit
+        # does not fail again, and stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    if profiler is not None:
+        sys.stderr.write(profiler.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())